@@ -29,6 +29,10 @@ class Config:
     ENABLE_CACHE = os.getenv("ENABLE_CACHE", "true").lower() == "true"
     CACHE_TTL = int(os.getenv("CACHE_TTL", "3600"))
     
+    # PDF 报告字体：指定中文字体文件（.ttf / .ttc），留空则自动搜索系统字体
+    PDF_FONT_PATH = os.getenv("PDF_FONT_PATH", "")
+    PDF_FONT_SUBFONT_INDEX = int(os.getenv("PDF_FONT_SUBFONT_INDEX", "0"))
+    
     # Jupyter 配置
     JUPYTER_PORT = int(os.getenv("JUPYTER_PORT", "8888"))
     
@@ -10,6 +10,8 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from IPython.display import display, Markdown
 
+from src.visualization import column_array
+
 print("🔍 开始分析：最近五年保费结构与综合成本率")
 print("=" * 80)
 
@@ -242,8 +244,11 @@ fig = make_subplots(
     specs=[[{"secondary_y": False}], [{"secondary_y": False}]]
 )
 
-# 转换为 Pandas 用于 Plotly
-df_plot = yearly_analysis_5y.to_pandas()
+# 直接取 Polars 列缓冲区用于 Plotly（无需转换为 Pandas）
+df_plot = {
+    col: column_array(yearly_analysis_5y, col)
+    for col in ['业务年度', '自留保费', '分出保费', '毛保费', '毛成本率', '自留成本率', '分出成本率']
+}
 
 # === 子图1: 保费堆叠柱状图 + 毛保费折线 ===
 fig.add_trace(
@@ -300,7 +305,8 @@ fig.add_trace(
         mode='lines+markers+text',
         line=dict(color='#C73E1D', width=3),
         marker=dict(size=10),
-        text=df_plot['毛成本率'].apply(lambda x: f'{x:.1f}%'),
+        text=df_plot['毛成本率'],
+        texttemplate='%{text:.1f}%',
         textposition='top center',
         hovertemplate='毛成本率: %{y:.2f}%<extra></extra>'
     ),
@@ -315,7 +321,8 @@ fig.add_trace(
         mode='lines+markers+text',
         line=dict(color='#2E86AB', width=2, dash='dash'),
         marker=dict(size=8),
-        text=df_plot['自留成本率'].apply(lambda x: f'{x:.1f}%'),
+        text=df_plot['自留成本率'],
+        texttemplate='%{text:.1f}%',
         textposition='bottom center',
         hovertemplate='自留成本率: %{y:.2f}%<extra></extra>'
     ),
@@ -330,7 +337,8 @@ fig.add_trace(
         mode='lines+markers+text',
         line=dict(color='#A23B72', width=2, dash='dot'),
         marker=dict(size=8),
-        text=df_plot['分出成本率'].apply(lambda x: f'{x:.1f}%'),
+        text=df_plot['分出成本率'],
+        texttemplate='%{text:.1f}%',
         textposition='middle right',
         hovertemplate='分出成本率: %{y:.2f}%<extra></extra>'
     ),
@@ -9,7 +9,7 @@ from src.session import DataSession
 from src.dashboard import DashboardBuilder
 from src.utils import enable_polars_markdown_display, print_markdown_table
 import polars as pl
-import plotly.express as px
+from src.visualization import bar  # Polars 直连绘图（无需 to_pandas）
 
 print("=" * 80)
 print("🚀 自动仪表盘创建示例")
@@ -162,13 +162,18 @@ def update_dashboard(controls):
     print(f"- 险种数: {result.height}\n")
     
     # 创建可视化
-    fig = px.bar(
-        result.head(10).to_pandas(),
+    top10 = result.head(10)
+    fig = bar(
+        top10,
         x='业务险种',
         y='保费',
         title=f'{year}年 Top 10 险种保费',
         text='保费',
-        hover_data=['保额', '保单数', '平均保单保费']
+        customdata=top10.select(['保额', '保单数', '平均保单保费']).to_numpy(),
+        hovertemplate=(
+            '%{x}<br>保费=%{y:,.0f}<br>保额=%{customdata[0]:,.0f}'
+            '<br>保单数=%{customdata[1]:,}<br>平均保单保费=%{customdata[2]:,.2f}<extra></extra>'
+        )
     )
     
     fig.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
@@ -6,7 +6,7 @@
 
 from src.dashboard import DashboardBuilder
 import polars as pl
-import plotly.express as px
+from src.visualization import bar  # Polars 直连绘图（无需 to_pandas）
 
 # 从已加载的数据中提取真实的选项值
 # 假设你的数据已经通过 session.load() 加载为 df_df
@@ -73,17 +73,16 @@ if 'df_df' in globals():
         ]).sort('业务年度')
         
         # 创建图表
-        fig = px.bar(
-            summary.to_pandas(),
+        fig = bar(
+            summary,
             x='业务年度',
             y='总保费',
             title=f'{selected_value} - 按年度保费分析',
-            labels={'总保费': '保费金额（元）', '业务年度': '年度'},
             text='总保费'
         )
         
         fig.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
-        fig.update_layout(height=500, showlegend=True)
+        fig.update_layout(height=500, showlegend=True, xaxis_title='年度', yaxis_title='保费金额（元）')
         
         return fig
     
@@ -62,6 +62,7 @@ import plotly.graph_objects as go
 import polars as pl
 import panel as pn
 from datetime import datetime, timedelta
+from src.visualization import bar, line  # Polars 直连绘图（无需 to_pandas）
 ```
 
 **为什么？**
@@ -71,6 +72,7 @@ from datetime import datetime, timedelta
 
 **检查清单：**
 □ plotly.express (如果用 px.bar, px.line 等)
+□ src.visualization (如果用 bar, line 直接绘制 Polars 结果)
 □ plotly.graph_objects (如果用 go.Figure)
 □ polars as pl (如果直接用 pl.col, pl.when 等)
 □ datetime/timedelta (如果处理日期)
@@ -155,15 +157,9 @@ def update_dashboard(*args):
     group_col = dashboard.widgets['_aggregation_dimension'].value
 ```
 
-步骤 2: 极简动态过滤
+步骤 2: 极简动态过滤（所有维度编译为单个谓词，一次扫描，自动处理"全选"）
 ```python
-    filtered = df_df
-    for dim, val in data_filters.items():
-        if isinstance(val, list):
-            if '全选' not in val:
-                filtered = filtered.filter(pl.col(dim).is_in(val))
-        elif val != '全选':
-            filtered = filtered.filter(pl.col(dim) == val)
+    filtered = dashboard.apply_filters(df_df, data_filters)
 ```
 
 步骤 3: 聚合分析与可视化 (使用变量)
@@ -172,7 +168,7 @@ def update_dashboard(*args):
         pl.col('总保费').sum().alias('保费')
     ])
     
-    fig = px.bar(result.to_pandas(), x=group_col, y='保费')
+    fig = bar(result, x=group_col, y='保费')  # 直接传入 Polars 结果，无需 to_pandas()
     fig.update_layout(autosize=True)
 ```
 
@@ -181,8 +177,8 @@ def update_dashboard(*args):
 📝 **完整代码模板**
 
 ```python
-import plotly.express as px
 import polars as pl
+from src.visualization import bar
 
 @pn.depends(*dashboard.widgets.values())
 def update_dashboard(*args):
@@ -200,14 +196,8 @@ def update_dashboard(*args):
     # 2. 获取当前的动态聚合轴
     agg_axis = dashboard.widgets['_aggregation_dimension'].value
     
-    # 3. 执行动态过滤
-    df_filtered = df_df
-    for col, val in filters.items():
-        if isinstance(val, list):
-            if '全选' not in val:
-                df_filtered = df_filtered.filter(pl.col(col).is_in(val))
-        elif val != '全选':
-            df_filtered = df_filtered.filter(pl.col(col) == val)
+    # 3. 执行动态过滤（单次扫描）
+    df_filtered = dashboard.apply_filters(df_df, filters)
             
     # 4. 业务逻辑 (示例：Top 10 排名)
     analysis = df_filtered.group_by(agg_axis).agg([
@@ -216,7 +206,7 @@ def update_dashboard(*args):
     ]).sort('总额', descending=True).head(10)
     
     # 5. 可视化
-    fig = px.bar(analysis.to_pandas(), x=agg_axis, y='总额', title=f'按{agg_axis}统计结果')
+    fig = bar(analysis, x=agg_axis, y='总额', title=f'按{agg_axis}统计结果')
     fig.update_layout(autosize=True, height=600)
     
     # 6. 辅助表格输出
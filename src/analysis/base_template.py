@@ -4,13 +4,13 @@
 """
 
 import polars as pl
-import plotly.express as px
 import panel as pn
 from IPython.display import HTML, display
 
 from src.session import DataSession
 from src.dashboard import PanelDashboardBuilder
 from src.utils import print_markdown_table
+from src.visualization import bar
 
 # ========================================
 # 1. 环境初始化
@@ -42,13 +42,8 @@ def build_analysis(df: pl.DataFrame, dimensions: list, title: str):
         agg_axis = dashboard.widgets['_aggregation_dimension'].value
         
         # --- [B] 动态数据过滤 ---
-        tmp_df = df
-        for col, val in filters.items():
-            if isinstance(val, list):
-                if '全选' not in val:
-                    tmp_df = tmp_df.filter(pl.col(col).is_in(val))
-            elif val != '全选':
-                tmp_df = tmp_df.filter(pl.col(col) == val)
+        # 所有维度编译为单个谓词，一次扫描完成过滤（自动处理"全选"）
+        tmp_df = dashboard.apply_filters(df, filters)
         
         # --- [C] 业务聚合逻辑 ---
         # 示例：计算总额和计数
@@ -63,8 +58,9 @@ def build_analysis(df: pl.DataFrame, dimensions: list, title: str):
         )
         
         # --- [D] 可视化输出 ---
-        fig = px.bar(
-            result.to_pandas(), 
+        # 直接使用 Polars 列缓冲区绘图，无需 to_pandas()
+        fig = bar(
+            result, 
             x=agg_axis, 
             y='指标总额', 
             title=f"按 {agg_axis} 统计分析"
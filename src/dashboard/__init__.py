@@ -2,5 +2,6 @@
 
 from .builder import DashboardBuilder
 from .panel_builder import PanelDashboardBuilder
+from .workspace import DashboardWorkspace
 
-__all__ = ["DashboardBuilder", "PanelDashboardBuilder"]
+__all__ = ["DashboardBuilder", "PanelDashboardBuilder", "DashboardWorkspace"]
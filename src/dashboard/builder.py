@@ -3,11 +3,16 @@
 让 AI 只需要关注业务逻辑，不需要处理组件初始化和回调
 """
 
+from contextlib import nullcontext
+
 import ipywidgets as widgets
-from IPython.display import display, clear_output
+from IPython.display import display, clear_output, Markdown
 from typing import Callable, Dict, Any, List, Optional
 import polars as pl
 
+from .profiling import CallbackProfiler, state_key
+from src.utils.artifacts import ReportArtifacts, as_figures, capture
+
 
 class DashboardBuilder:
     """
@@ -39,6 +44,8 @@ class DashboardBuilder:
         self.output_area = widgets.Output(layout=widgets.Layout(width='100%'))  # 设置为100%宽度
         self.layout_items = []
         self._update_function = None
+        self.profiler: Optional[CallbackProfiler] = None  # enable_profiling() 后的回调耗时诊断
+        self.artifacts: Optional[ReportArtifacts] = None  # 最近一次回调的图表与表格（报告导出直接复用）
     
     @classmethod
     def from_data(
@@ -470,6 +477,23 @@ class DashboardBuilder:
         self._update_function = func
         return self
     
+    def enable_profiling(self, **kwargs) -> "DashboardBuilder":
+        """
+        启用回调耗时诊断（各阶段耗时、按状态分位数、慢回调快照），build() 时增加诊断开关
+        
+        Args:
+            **kwargs: 传递给 CallbackProfiler 的参数（slow_ms, capture_plans, profiler, window）
+        
+        Examples:
+            >>> dashboard.enable_profiling(slow_ms=300)
+            >>> def update(controls):
+            ...     with dashboard.profiler.phase('filter'):
+            ...         df_filtered = df.filter(...)
+            ...     return fig
+        """
+        self.profiler = CallbackProfiler(**kwargs)
+        return self
+    
     def _on_change(self, change):
         """控件值变化时的回调"""
         if self._update_function:
@@ -482,13 +506,19 @@ class DashboardBuilder:
                     if not isinstance(ctrl, widgets.Button):
                         values[name] = ctrl.value
                 
+                state = state_key(values)
+                profiled = self.profiler.callback(state) if self.profiler else nullcontext()
                 try:
-                    # 调用用户定义的更新函数
-                    result = self._update_function(values)
-                    
-                    # 显示结果
-                    if result is not None:
-                        display(result)
+                    with profiled:
+                        # 调用用户定义的更新函数（输出的表格记为报告产物）
+                        with capture() as tables:
+                            result = self._update_function(values)
+                        self.artifacts = ReportArtifacts(state, as_figures(result), tables)
+                        
+                        # 显示结果（图表序列化与下发）
+                        if result is not None:
+                            with self.profiler.phase('render') if self.profiler else nullcontext():
+                                display(result)
                 
                 except Exception as e:
                     print(f"❌ 错误: {e}")
@@ -532,6 +562,9 @@ class DashboardBuilder:
             output_box
         ], layout=widgets.Layout(width='100%'))  # 容器也设置为100%
         
+        if self.profiler is not None:
+            dashboard.children += (self._build_diagnostics(),)
+        
         # 显示
         display(dashboard)
         
@@ -540,6 +573,29 @@ class DashboardBuilder:
         
         return self
     
+    def _build_diagnostics(self):
+        """可开关的诊断面板：打开时随每次回调刷新"""
+        toggle = widgets.ToggleButton(value=False, description='🩺 诊断')
+        report_area = widgets.Output(layout=widgets.Layout(width='100%', display='none'))
+        
+        def refresh(*_):
+            if toggle.value:
+                with report_area:
+                    clear_output(wait=True)
+                    display(Markdown(self.profiler.report()))
+        
+        def on_toggle(change):
+            report_area.layout.display = None if change['new'] else 'none'
+            refresh()
+        
+        toggle.observe(on_toggle, names='value')
+        self.profiler.on_record(refresh)
+        return widgets.VBox([toggle, report_area], layout=widgets.Layout(width='100%'))
+    
+    def widget_state(self):
+        """当前控件状态键"""
+        return state_key(self.get_values())
+
     def get_values(self) -> Dict[str, Any]:
         """
         获取当前所有控件的值
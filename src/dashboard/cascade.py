@@ -0,0 +1,125 @@
+"""
+级联（联动）过滤
+
+基于维度组合表（各维度取值的共现组合 + 行数）计算每个控件的可选项：
+某个控件变化时，只重算其余控件的选项，且只扫描组合表，不再扫描原始数据。
+"""
+
+import panel as pn
+import polars as pl
+from typing import Any, Dict, List, Optional, Tuple
+
+from .filters import ALL_OPTION, apply_filter_expr, build_filter_expr
+
+
+def _freeze(value: Any) -> Any:
+    """控件值转换为可哈希的缓存键"""
+    if isinstance(value, (list, tuple, set)):
+        return tuple(value)
+    return value
+
+
+class CascadingFilters:
+    """
+    维度联动控制器
+
+    Examples:
+        >>> cascade = CascadingFilters(df, ['机构名称', '业务险种'])
+        >>> cascade.options_for('业务险种', {'机构名称': ['北京分公司']})
+        ['车险', '财产险']
+        >>> cascade.bind(dashboard.data_controls)  # 控件变化时自动收窄其他控件选项
+    """
+
+    MAX_CACHE_SIZE = 256
+
+    def __init__(self, df: pl.DataFrame, dimensions: List[str]):
+        self.dimensions = [d for d in dimensions if d in df.columns]
+        # 维度共现表：每种取值组合出现一次，附带行数
+        self.combinations = df.group_by(self.dimensions).len()
+        self.widgets: Dict[str, Any] = {}
+        self.searchers: Dict[str, Any] = {}
+        self._cache: Dict[Tuple, List[Any]] = {}
+        self._updating = False
+
+    def options_for(self, dim: str, values: Dict[str, Any]) -> List[Any]:
+        """
+        计算维度 dim 在其他维度当前选择下的可选值
+
+        Args:
+            dim: 目标维度
+            values: 所有维度的当前值 {字段名: 选中值}
+
+        Returns:
+            排序后的可选值列表（不含"全选"）
+        """
+        others = {k: v for k, v in values.items() if k != dim and k in self.dimensions}
+        key = (dim, tuple(sorted((k, _freeze(v)) for k, v in others.items())))
+        if key in self._cache:
+            return self._cache[key]
+
+        table = apply_filter_expr(self.combinations, build_filter_expr(others))
+        options = table.get_column(dim).drop_nulls().unique().sort().to_list()
+
+        if len(self._cache) >= self.MAX_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[key] = options
+        return options
+
+    def bind(self, widgets: Dict[str, Any], searchers: Optional[Dict[str, Any]] = None):
+        """
+        监听控件值变化，联动更新其他控件的选项
+
+        Args:
+            widgets: {字段名: 控件}
+            searchers: {字段名: SearchableOptions}，高基数控件的选项由搜索器按候选集下发
+        """
+        self.widgets = {k: w for k, w in widgets.items() if k in self.dimensions}
+        self.searchers = searchers or {}
+        for dim, widget in self.widgets.items():
+            widget.param.watch(lambda event, dim=dim: self._on_change(dim), 'value')
+        return self
+
+    def _on_change(self, changed_dim: str):
+        if self._updating:
+            return
+
+        self._updating = True
+        try:
+            with pn.io.hold():
+                # 收窄选项可能会改变其他控件的值，循环直到稳定（最多维度数轮）
+                dirty = {changed_dim}
+                for _ in range(len(self.widgets)):
+                    values = {k: w.value for k, w in self.widgets.items()}
+                    changed = set()
+                    for dim, widget in self.widgets.items():
+                        if dirty == {dim}:
+                            continue
+                        options = self.options_for(dim, values)
+                        if self._apply_options(widget, options, self.searchers.get(dim)):
+                            changed.add(dim)
+                    if not changed:
+                        break
+                    dirty = changed
+        finally:
+            self._updating = False
+
+    @staticmethod
+    def _apply_options(widget, options: List[Any], searcher=None) -> bool:
+        """更新控件选项，并修正失效的已选值；返回值是否被修改"""
+        old_value = widget.value
+        allowed = set(options)
+
+        if isinstance(old_value, list):
+            kept = [v for v in old_value if v == ALL_OPTION or v in allowed]
+            new_value = kept or [ALL_OPTION]
+        else:
+            new_value = old_value if old_value in allowed else ALL_OPTION
+
+        if searcher is None:
+            widget.options = [ALL_OPTION] + options
+        if widget.value != new_value:
+            widget.value = new_value
+        if searcher is not None:
+            # 高基数控件：新的已选值是旧值的子集，先改值再按候选集重新下发 top-N
+            searcher.restrict(options)
+        return new_value != old_value
@@ -0,0 +1,344 @@
+"""
+数据立方体导出（浏览器端过滤与聚合）
+
+不再为每个控件状态预渲染一张图，而是把按维度预聚合的立方体本身嵌入 HTML：
+- 维度列做字典编码（uint8/16/32），度量列为 float64，按列连续存放
+- 整体 gzip 压缩后 base64 嵌入，文件大小与立方体行数成正比，与状态组合数无关
+- 浏览器用原生 DecompressionStream 解压，附带的小型 JS 运行时完成过滤、分组聚合与绘图
+
+二进制布局：[uint32 头部长度][头部 JSON (UTF-8)][按 8 字节对齐的各列数据]
+"""
+
+import base64
+import gzip
+import html
+import json
+import struct
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import polars as pl
+
+from .filters import align_range, is_range
+
+COUNT_COLUMN = '__count'
+NON_NULL_PREFIX = '__count:'
+NULL_LABEL = '(空)'
+SUPPORTED_AGGREGATIONS = ('sum', 'count', 'mean', 'min', 'max')
+
+
+def _code_dtype(n_values: int) -> np.dtype:
+    if n_values < 2 ** 8:
+        return np.dtype(np.uint8)
+    if n_values < 2 ** 16:
+        return np.dtype(np.uint16)
+    return np.dtype(np.uint32)
+
+
+def _json_label(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+class CubeExporter:
+    """
+    预聚合立方体导出器
+
+    Examples:
+        >>> exporter = CubeExporter(
+        ...     df,
+        ...     dimensions=['业务年度', '业务险种', '机构名称'],
+        ...     measures={'总保费': 'sum', '自留保费': 'sum'},
+        ... )
+        >>> exporter.export('保费分析_离线版.html', title='保费分析')
+    """
+
+    def __init__(
+        self,
+        df: pl.DataFrame,
+        dimensions: List[str],
+        measures: Dict[str, str],
+        range_dimensions: Optional[List[str]] = None
+    ):
+        """
+        Args:
+            df: 源数据
+            dimensions: 过滤维度
+            measures: {字段名: 聚合方式}
+            range_dimensions: 使用起止区间控件的维度，缺省时为全部日期/时间维度
+        """
+        invalid = {c: a for c, a in measures.items() if a not in SUPPORTED_AGGREGATIONS}
+        if invalid:
+            raise ValueError(f"不支持的聚合方式: {invalid}（可选: {', '.join(SUPPORTED_AGGREGATIONS)}）")
+
+        self.dimensions = [d for d in dimensions if d in df.columns]
+        self.measures = {c: a for c, a in measures.items() if c in df.columns or a == 'count'}
+        if range_dimensions is None:
+            range_dimensions = [d for d in self.dimensions if df.schema[d] in (pl.Date, pl.Datetime)]
+        self.range_dimensions = [d for d in range_dimensions if d in self.dimensions]
+
+        # min/max 在立方体中保留极值，sum/mean 保留合计；mean 另存非空值个数，浏览器端用合计除以非空个数
+        aggs = [pl.len().alias(COUNT_COLUMN)]
+        for col, agg in self.measures.items():
+            if agg == 'count':
+                continue
+            if agg == 'min':
+                aggs.append(pl.col(col).min().alias(col))
+            elif agg == 'max':
+                aggs.append(pl.col(col).max().alias(col))
+            else:
+                aggs.append(pl.col(col).sum().alias(col))
+            if agg == 'mean':
+                aggs.append(pl.col(col).count().alias(NON_NULL_PREFIX + col))
+        self.cube = df.group_by(self.dimensions).agg(aggs)
+
+    def encode(self) -> bytes:
+        """将立方体编码为 gzip 压缩的列式二进制"""
+        header: Dict[str, Any] = {'rows': self.cube.height, 'dimensions': [], 'measures': []}
+        buffers: List[bytes] = []
+        offset = 0
+
+        def add_buffer(array: np.ndarray) -> Dict[str, Any]:
+            nonlocal offset
+            data = np.ascontiguousarray(array).tobytes()
+            padding = (-len(data)) % 8
+            entry = {'offset': offset, 'dtype': array.dtype.name, 'length': len(array)}
+            buffers.append(data + b'\0' * padding)
+            offset += len(data) + padding
+            return entry
+
+        for dim in self.dimensions:
+            series = self.cube.get_column(dim)
+            labels = series.drop_nulls().unique().sort().to_list()
+            codes = (series.rank('dense') - 1).fill_null(len(labels)).to_numpy()
+            if series.null_count() > 0:
+                labels.append(NULL_LABEL)
+            entry = add_buffer(codes.astype(_code_dtype(len(labels))))
+            entry.update(name=dim, labels=[_json_label(v) for v in labels], range=dim in self.range_dimensions)
+            header['dimensions'].append(entry)
+
+        value_columns = [c for c, a in self.measures.items() if a != 'count']
+        non_null_columns = [NON_NULL_PREFIX + c for c, a in self.measures.items() if a == 'mean']
+        for col in [COUNT_COLUMN] + value_columns + non_null_columns:
+            values = self.cube.get_column(col).cast(pl.Float64).to_numpy()
+            entry = add_buffer(values.astype(np.float64))
+            entry.update(name=col)
+            header['measures'].append(entry)
+
+        header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        header_bytes += b' ' * ((-(4 + len(header_bytes))) % 8)
+        raw = struct.pack('<I', len(header_bytes)) + header_bytes + b''.join(buffers)
+        return gzip.compress(raw, compresslevel=9)
+
+    def _range_default(self, dim: str, value: Any) -> Any:
+        """区间 (起, 止) → [首个取值标签, 末个取值标签]（区间内实际存在的取值），其余值原样返回"""
+        if isinstance(value, list):
+            value = tuple(value)
+        if not is_range(value):
+            return value
+        members = self.cube.get_column(dim).drop_nulls().unique().sort()
+        if members.is_empty():
+            return value
+        value = align_range(value, members[0])
+        last = len(members) - 1
+        lo = min(members.search_sorted(value[0], 'left'), last)
+        hi = max(members.search_sorted(value[1], 'right') - 1, 0)
+        return [_json_label(members[lo]), _json_label(members[hi])]
+
+    def export(
+        self,
+        filename: str,
+        title: str = "数据分析仪表盘",
+        defaults: Optional[Dict[str, Any]] = None,
+        plotlyjs: str = "inline"
+    ) -> str:
+        """
+        写出可离线交互的 HTML
+
+        Args:
+            filename: 输出文件名
+            title: 页面标题
+            defaults: 初始选择 {维度: 值或值列表}，"全选"或缺省表示不过滤；区间维度取 (起, 止)
+            plotlyjs: "inline" 内嵌 plotly.js（可离线）或 "cdn"
+
+        Returns:
+            输出文件路径
+        """
+        payload = base64.b64encode(self.encode()).decode('ascii')
+        config = {
+            'measures': self.measures,
+            'countColumn': COUNT_COLUMN,
+            'nonNullPrefix': NON_NULL_PREFIX,
+            'nullLabel': NULL_LABEL,
+            'defaults': {
+                k: self._range_default(k, v) if k in self.range_dimensions else v
+                for k, v in (defaults or {}).items() if k in self.dimensions
+            },
+        }
+
+        if plotlyjs == "inline":
+            from plotly.offline import get_plotlyjs
+            plotly_tag = f"<script>{get_plotlyjs()}</script>"
+        else:
+            plotly_tag = '<script src="https://cdn.plot.ly/plotly-latest.min.js"></script>'
+
+        page = _TEMPLATE.format(
+            title=html.escape(title),
+            plotly_tag=plotly_tag,
+            payload=payload,
+            config=json.dumps(config, ensure_ascii=False, default=str).replace("</", "<\\/"),
+        )
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(page)
+
+        print(f"📦 立方体: {self.cube.height:,} 行 × {len(self.dimensions)} 维 × {len(self.measures)} 个度量")
+        print(f"📤 已导出: {filename} (数据 {len(payload) / 1024:,.1f} KB)")
+        return filename
+
+
+_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{title}</title>
+    {plotly_tag}
+    <style>
+        body {{ font-family: "Microsoft YaHei", Arial, sans-serif; margin: 20px; }}
+        .controls {{ display: flex; flex-wrap: wrap; gap: 16px; margin-bottom: 20px; }}
+        .controls label {{ display: flex; flex-direction: column; font-size: 13px; }}
+        .controls select[multiple] {{ min-width: 160px; height: 110px; }}
+    </style>
+</head>
+<body>
+    <h1>{title}</h1>
+    <div class="controls" id="controls"></div>
+    <div id="chart" style="width: 100%; height: 520px;"></div>
+    <script>
+    const CUBE_B64 = "{payload}";
+    const CONFIG = {config};
+    const ALL = '全选';
+
+    async function loadCube() {{
+        const bytes = Uint8Array.from(atob(CUBE_B64), c => c.charCodeAt(0));
+        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+        const buffer = await new Response(stream).arrayBuffer();
+        const headerLength = new DataView(buffer).getUint32(0, true);
+        const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 4, headerLength)));
+        const base = 4 + headerLength;
+        const types = {{uint8: Uint8Array, uint16: Uint16Array, uint32: Uint32Array, float64: Float64Array}};
+        const view = col => new types[col.dtype](buffer, base + col.offset, col.length);
+        header.dimensions.forEach(d => d.codes = view(d));
+        header.measures.forEach(m => m.values = view(m));
+        return header;
+    }}
+
+    function makeSelect(label, options, multiple, selected) {{
+        const wrapper = document.createElement('label');
+        wrapper.textContent = label;
+        const select = document.createElement('select');
+        select.multiple = multiple;
+        options.forEach((text, i) => {{
+            const option = new Option(text, i);
+            option.selected = selected.includes(i);
+            select.appendChild(option);
+        }});
+        wrapper.appendChild(select);
+        document.getElementById('controls').appendChild(wrapper);
+        return select;
+    }}
+
+    function makeChoice(dim, initial) {{
+        // 选项 0 为"全选"，其余选项下标减一即维度编码
+        const selected = initial.includes(ALL) ? [0]
+            : initial.map(v => dim.labels.indexOf(v) + 1).filter(i => i > 0);
+        const select = makeSelect(dim.name, [ALL, ...dim.labels], dim.labels.length > 10, selected);
+        return {{
+            inputs: [select],
+            codes: () => {{
+                const picked = Array.from(select.selectedOptions).map(o => Number(o.value));
+                if (picked.length === 0 || picked.includes(0)) return null;
+                return new Set(picked.map(i => i - 1));
+            }}
+        }};
+    }}
+
+    function makeRange(dim, initial) {{
+        // 起止两个下拉框，选项下标即维度编码（标签已排序，空值编码排在最后）；覆盖整个范围时不过滤
+        const members = dim.labels.filter(l => l !== CONFIG.nullLabel);
+        const last = members.length - 1;
+        const [lo, hi] = initial.length === 2 && !initial.includes(ALL)
+            ? [Math.max(members.indexOf(initial[0]), 0), Math.max(members.indexOf(initial[1]), 0)]
+            : [0, last];
+        const from = makeSelect(`${{dim.name}} 起`, members, false, [lo]);
+        const to = makeSelect(`${{dim.name}} 止`, members, false, [hi]);
+        return {{
+            inputs: [from, to],
+            codes: () => {{
+                const start = Number(from.value), end = Number(to.value);
+                if (start === 0 && end === last) return null;
+                const allowed = new Set();
+                for (let c = start; c <= end; c++) allowed.add(c);
+                return allowed;
+            }}
+        }};
+    }}
+
+    loadCube().then(cube => {{
+        const filters = cube.dimensions.map(dim => {{
+            const initial = [].concat(CONFIG.defaults[dim.name] ?? ALL);
+            return dim.range ? makeRange(dim, initial) : makeChoice(dim, initial);
+        }});
+        const measureNames = Object.keys(CONFIG.measures);
+        const groupSelect = makeSelect('⚡️ 聚合维度', cube.dimensions.map(d => d.name), false, [0]);
+        const measureSelect = makeSelect('📏 指标', measureNames, false, [0]);
+        const columns = Object.fromEntries(cube.measures.map(m => [m.name, m.values]));
+
+        function render() {{
+            const active = filters.map((filter, i) => [cube.dimensions[i].codes, filter.codes()])
+                .filter(([, codes]) => codes !== null);
+            const group = cube.dimensions[Number(groupSelect.value)];
+            const measure = measureNames[Number(measureSelect.value)];
+            const agg = CONFIG.measures[measure];
+            const source = agg === 'count' ? columns[CONFIG.countColumn] : columns[measure];
+            const counts = columns[CONFIG.countColumn];
+            const nonNull = columns[CONFIG.nonNullPrefix + measure];
+
+            const n = group.labels.length;
+            const acc = new Float64Array(n).fill(agg === 'min' ? Infinity : agg === 'max' ? -Infinity : 0);
+            const rows = new Float64Array(n);
+            const valid = new Float64Array(n);
+            nextRow: for (let r = 0; r < cube.rows; r++) {{
+                for (const [codes, allowed] of active) {{
+                    if (!allowed.has(codes[r])) continue nextRow;
+                }}
+                const g = group.codes[r];
+                const v = source[r];
+                rows[g] += counts[r];
+                if (nonNull) valid[g] += nonNull[r];
+                if (Number.isNaN(v)) continue;
+                if (agg === 'min') acc[g] = Math.min(acc[g], v);
+                else if (agg === 'max') acc[g] = Math.max(acc[g], v);
+                else acc[g] += v;
+            }}
+
+            const x = [], y = [];
+            for (let g = 0; g < n; g++) {{
+                if (rows[g] === 0) continue;
+                x.push(String(group.labels[g]));
+                y.push(agg === 'mean' ? (valid[g] > 0 ? acc[g] / valid[g] : null) : acc[g]);
+            }}
+            Plotly.react('chart', [{{type: 'bar', x: x, y: y, name: measure}}], {{
+                title: {{text: `按 ${{group.name}} 统计 ${{measure}}`}},
+                autosize: true,
+                xaxis: {{type: 'category'}}
+            }}, {{responsive: true}});
+        }}
+
+        [...filters.flatMap(f => f.inputs), groupSelect, measureSelect].forEach(s => s.addEventListener('change', render));
+        render();
+    }});
+    </script>
+</body>
+</html>
+"""
@@ -0,0 +1,95 @@
+"""
+仪表盘过滤条件编译
+
+把控件值字典 {字段名: 选中值} 编译为单个 Polars 谓词，
+一次扫描完成所有维度的过滤，取代逐维度 `filter()` 的循环写法。
+"""
+
+import datetime as dt
+
+import polars as pl
+from typing import Any, Dict, Optional, Union
+
+ALL_OPTION = '全选'
+
+FrameLike = Union[pl.DataFrame, pl.LazyFrame]
+
+
+def is_unfiltered(value: Any) -> bool:
+    """判断控件值是否代表"不过滤"（全选）"""
+    if isinstance(value, (list, tuple, set)):
+        return ALL_OPTION in value
+    return value == ALL_OPTION
+
+
+def is_range(value: Any) -> bool:
+    """判断控件值是否为区间选择（日期区间滑块的 (起, 止) 元组）"""
+    return (
+        isinstance(value, tuple)
+        and len(value) == 2
+        and all(isinstance(v, (dt.date, dt.datetime)) for v in value)
+    )
+
+
+def align_temporal(value: Any, like: Any) -> Any:
+    """
+    将日期 / 时间值转换为与 like 相同的类型，便于比较（date 与 datetime 不能直接比较）
+
+    datetime → date 取日期部分；date → datetime 取当天零点；其他值原样返回
+
+    Examples:
+        >>> align_temporal(dt.datetime(2024, 3, 1, 12), dt.date(2024, 1, 1))
+        datetime.date(2024, 3, 1)
+    """
+    if isinstance(like, dt.datetime):
+        if isinstance(value, dt.date) and not isinstance(value, dt.datetime):
+            return dt.datetime.combine(value, dt.time.min)
+    elif isinstance(like, dt.date) and isinstance(value, dt.datetime):
+        return value.date()
+    return value
+
+
+def align_range(value: Any, like: Any) -> Any:
+    """区间 (起, 止) 的两端按 align_temporal 转换；非区间值原样返回"""
+    if not is_range(value):
+        return value
+    return tuple(align_temporal(v, like) for v in value)
+
+
+def build_filter_expr(values: Dict[str, Any]) -> Optional[pl.Expr]:
+    """
+    将控件值编译为组合谓词
+
+    Args:
+        values: {字段名: 选中值}，单选为标量，多选为列表，日期区间为 (起, 止) 元组（两端包含）
+
+    Returns:
+        组合后的 pl.Expr；所有维度均为"全选"时返回 None
+
+    Examples:
+        >>> expr = build_filter_expr({'业务年度': 2024, '业务险种': ['车险', '财产险']})
+        >>> df.filter(expr)
+    """
+    predicates = []
+    for col, val in values.items():
+        if is_unfiltered(val):
+            continue
+        if is_range(val):
+            predicates.append(pl.col(col).is_between(val[0], val[1], closed='both'))
+        elif isinstance(val, (list, tuple, set)):
+            predicates.append(pl.col(col).is_in(list(val)))
+        else:
+            predicates.append(pl.col(col) == val)
+
+    if not predicates:
+        return None
+    if len(predicates) == 1:
+        return predicates[0]
+    return pl.all_horizontal(predicates)
+
+
+def apply_filter_expr(df: FrameLike, expr: Optional[pl.Expr]) -> FrameLike:
+    """对 DataFrame / LazyFrame 应用谓词（None 表示不过滤，原样返回）"""
+    if expr is None:
+        return df
+    return df.filter(expr)
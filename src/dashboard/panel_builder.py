@@ -4,11 +4,38 @@ Panel-based Dashboard Builder
 支持静态 HTML 导出的交互式仪表盘构建器。
 """
 
+import time
+from contextlib import nullcontext
+
 import panel as pn
+import param
+import plotly.io as pio
 import polars as pl
 from typing import List, Dict, Any, Callable, Optional
 import plotly.graph_objects as go
 
+from .filters import ALL_OPTION, FrameLike, align_range, apply_filter_expr, build_filter_expr, is_range
+from .index import DimensionIndex, SortedRangeIndex
+from .cascade import CascadingFilters
+from .search import SearchableOptions
+from .state_export import StateExporter
+from .cube_export import CubeExporter
+from .profiling import CallbackProfiler, state_key
+from .serving import SessionStats, serve_processes, session_app
+from config import Config
+from src.utils.artifacts import ReportArtifacts, as_figures, capture
+from src.visualization.downsample import downsample_figure
+
+_extension_loaded = False
+
+
+def _load_extension():
+    """Panel 扩展每个进程只加载一次（重复加载会重新注入前端资源）"""
+    global _extension_loaded
+    if not _extension_loaded:
+        pn.extension('plotly')
+        _extension_loaded = True
+
 
 class PanelDashboardBuilder:
     """
@@ -19,17 +46,45 @@ class PanelDashboardBuilder:
     - ✅ 自动从数据创建控件
     - ✅ 图表自适应占满宽度
     - ✅ 支持 Jupyter Notebook 和独立部署
+    - ✅ 超大图表自动降采样（折线 LTTB，分类柱 top-N + 其他）
     """
     
-    def __init__(self, title: str = "数据分析仪表盘"):
+    def __init__(
+        self,
+        title: str = "数据分析仪表盘",
+        max_points: Optional[int] = 5000,
+        max_categories: Optional[int] = 100
+    ):
+        """
+        Args:
+            title: 仪表盘标题
+            max_points: 折线 trace 超过该点数时做 LTTB 降采样（None = 关闭）
+            max_categories: 柱状图类别超过该数量时合并为 top-N + "其他"（None = 关闭）
+        """
         self.title = title
+        self.max_points = max_points
+        self.max_categories = max_categories
         self.widgets = {}
         self.update_function = None
         self.layout = None
         self._output_pane = None # 存储输出面板的引用
+        self.data: Optional[pl.DataFrame] = None  # from_data 传入的源数据
+        self.index: Optional[DimensionIndex] = None  # 维度倒排索引（可选）
+        self.cascade: Optional[CascadingFilters] = None  # 级联过滤控制器（可选）
+        self.searchers: Dict[str, SearchableOptions] = {}  # 高基数维度的服务端搜索
+        self.base_figure: Optional[go.Figure] = None  # patch 模式下原地更新的图表
+        self._output_watchers = []  # 输出面板在控件上注册的监听 [(对象, 监听), ...]
+        self.server_stats: Optional[SessionStats] = None  # serve(factory=...) 的会话统计
+        self.profiler: Optional[CallbackProfiler] = None  # enable_profiling() 后的回调耗时诊断
+        self._diagnostics_listener = None
+        self._deferred = False  # 当前布局是否延迟渲染首帧
+        self.workspace = None  # 所属的 DashboardWorkspace（共享控件与过滤结果）
+        self.range_dimensions: List[str] = []  # 使用日期区间控件的维度
+        self.range_indexes: Dict[str, SortedRangeIndex] = {}  # 首次区间过滤时按需构建
+        self.artifacts: Optional[ReportArtifacts] = None  # 最近一次回调的图表与表格（报告导出直接复用）
         
         # 初始化 Panel 扩展
-        pn.extension('plotly')
+        _load_extension()
     
     @classmethod
     def from_data(
@@ -37,7 +92,12 @@ class PanelDashboardBuilder:
         df: pl.DataFrame,
         dimensions: List[str],
         title: str = "数据分析仪表盘",
-        default_strategy: str = "all"
+        default_strategy: str = "all",
+        build_index: bool = False,
+        cascade: bool = False,
+        search_threshold: Optional[int] = None,
+        top_n: int = 100,
+        date_range: bool = True
     ) -> "PanelDashboardBuilder":
         """
         从数据自动创建仪表盘
@@ -47,6 +107,12 @@ class PanelDashboardBuilder:
             dimensions: 维度字段列表
             title: 仪表盘标题
             default_strategy: 默认值策略 ("all", "latest", "first")
+            build_index: 是否为维度字段构建倒排索引（大表推荐，apply_filters 将只收集命中行）
+            cascade: 是否启用级联过滤（控件选项随其他维度的选择联动收窄）
+            search_threshold: 唯一值数量超过该阈值的维度启用服务端搜索模式（None = 不启用）
+            top_n: 搜索模式下默认下发的高频选项数量
+            date_range: 日期/时间字段（超过 10 个取值）使用区间滑块而非多选，
+                区间过滤在首次使用时按该列建立有序索引，之后用二分查找取行
         
         Returns:
             配置好的 PanelDashboardBuilder 实例
@@ -73,6 +139,7 @@ class PanelDashboardBuilder:
         print(f"🔧 配置维度字段: {', '.join(dimensions)}\n")
         
         dashboard = cls(title=title)
+        dashboard.data = df
         
         # 为每个维度创建控件
         for dim in dimensions:
@@ -86,8 +153,41 @@ class PanelDashboardBuilder:
                 unique_values = [v for v in unique_values if v is not None]
                 n_unique = len(unique_values)
                 
-                # 根据唯一值数量选择控件类型
-                if n_unique <= 10:
+                # 根据字段类型与唯一值数量选择控件类型
+                dtype = df.schema[dim]
+                if date_range and dtype in (pl.Date, pl.Datetime) and n_unique > 10:
+                    # 日期/时间：区间滑块，默认覆盖全部范围（= 不过滤）
+                    slider = pn.widgets.DateRangeSlider if dtype == pl.Date else pn.widgets.DatetimeRangeSlider
+                    start, end = unique_values[0], unique_values[-1]
+                    widget = slider(
+                        name=f"📅 {dim}",
+                        start=start,
+                        end=end,
+                        value=(start, end),
+                        sizing_mode='stretch_width'
+                    )
+                    dashboard.range_dimensions.append(dim)
+                    print(f"  📅 {dim}: 日期区间 ({start} ~ {end}, {n_unique} 个取值)")
+                
+                elif search_threshold is not None and n_unique > search_threshold:
+                    # 超高基数：只下发 top-N 选项，输入时由服务端前缀索引查询
+                    if default_strategy == "all":
+                        default_vals = ['全选']
+                    else:
+                        default_vals = unique_values[:min(5, n_unique)]
+                    
+                    widget = pn.widgets.MultiChoice(
+                        name=f"📊 {dim}",
+                        options=['全选'] + [v for v in default_vals if v != '全选'],
+                        value=default_vals,
+                        sizing_mode='stretch_width'
+                    )
+                    dashboard.searchers[dim] = SearchableOptions.from_series(
+                        widget, df.get_column(dim), top_n=top_n
+                    )
+                    print(f"  🔍 {dim}: MultiChoice + 搜索 ({n_unique} 个选项, 默认下发 top {top_n})")
+                
+                elif n_unique <= 10:
                     # 少量选项：Select（单选）+ 全选
                     options_with_all = ['全选'] + unique_values
                     
@@ -130,7 +230,8 @@ class PanelDashboardBuilder:
                         value=default_vals,
                         sizing_mode='stretch_width'
                     )
-                    print(f"  ⚠️  {dim}: MultiChoice ({n_unique} 个选项 + 全选) - 建议 Phase 2 使用级联")
+                    hint = "已启用级联" if cascade else "建议启用级联 (cascade=True)"
+                    print(f"  ⚠️  {dim}: MultiChoice ({n_unique} 个选项 + 全选) - {hint}")
                 
                 dashboard.widgets[dim] = widget
                 
@@ -148,6 +249,20 @@ class PanelDashboardBuilder:
             dashboard.widgets['_aggregation_dimension'] = agg_widget
             print(f"\n  ✅ 聚合维度选择器: Select ({len(dimensions)} 个维度可选, 默认: {dimensions[0]})")
         
+        # 区间维度不参与倒排索引与级联（由有序索引处理）
+        categorical = [d for d in dashboard.data_controls if d not in dashboard.range_dimensions]
+        
+        if build_index:
+            start = time.perf_counter()
+            dashboard.index = DimensionIndex(df, categorical)
+            elapsed = time.perf_counter() - start
+            print(f"\n  ⚡️ 维度索引已构建: {len(dashboard.index.dimensions)} 个维度, 耗时 {elapsed:.2f}s")
+        
+        if cascade:
+            dashboard.cascade = CascadingFilters(df, categorical)
+            dashboard.cascade.bind(dashboard.data_controls, dashboard.searchers)
+            print(f"\n  🔗 级联过滤已启用: 维度组合表 {dashboard.cascade.combinations.height:,} 行")
+        
         print(f"\n✅ 仪表盘控件创建完成 ({len(dashboard.widgets)} 个控件)")
         print(f"💡 下一步: 使用 dashboard.set_update_function(your_function)\n")
         
@@ -206,12 +321,150 @@ class PanelDashboardBuilder:
         """
         return {k: v.value for k, v in self.data_controls.items()}
 
-    def set_update_function(self, func: Callable):
+    def filter_expr(self, values: Optional[Dict[str, Any]] = None) -> Optional[pl.Expr]:
+        """
+        ✅ 将所有数据维度控件的当前值编译为单个组合谓词（自动处理"全选"）
+        
+        Args:
+            values: 控件值字典，默认使用 self.data_values
+        
+        Returns:
+            pl.Expr；所有维度均为"全选"时返回 None
+        """
+        return build_filter_expr(self._normalize_ranges(self.data_values if values is None else values))
+
+    def _normalize_ranges(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        区间两端统一为控件的日期 / 时间类型；覆盖整个取值范围的区间等价于"全选"（不过滤）
+        """
+        normalized = dict(values)
+        for dim in self.range_dimensions:
+            value, widget = normalized.get(dim), self.widgets.get(dim)
+            if widget is None or not is_range(value):
+                continue
+            value = normalized[dim] = align_range(value, widget.start)
+            if value[0] <= widget.start and value[1] >= widget.end:
+                normalized[dim] = ALL_OPTION
+        return normalized
+
+    def _range_index(self, dim: str) -> SortedRangeIndex:
+        if dim not in self.range_indexes:
+            start = time.perf_counter()
+            self.range_indexes[dim] = SortedRangeIndex(self.data.get_column(dim))
+            print(f"⚡️ {dim} 有序索引已构建, 耗时 {time.perf_counter() - start:.2f}s")
+        return self.range_indexes[dim]
+
+    def _filter_source(self, values: Dict[str, Any]) -> pl.DataFrame:
+        """
+        过滤源数据：从命中行数最少的索引展开行号（区间维度二分查找，其余维度倒排索引），
+        只收集这些行后，再用谓词处理剩余条件
+        """
+        best = None  # (行数, 取行函数, 已被索引处理的维度)
+        for dim in self.range_dimensions:
+            if is_range(values.get(dim)):
+                start, end = values[dim]
+                index = self._range_index(dim)
+                size = index.count(start, end)
+                if best is None or size < best[0]:
+                    best = (size, lambda index=index, start=start, end=end: index.rows(start, end), {dim})
+        
+        if self.index is not None:
+            categorical = {k: v for k, v in values.items() if k not in self.range_dimensions}
+            index_rows, residual = self.index.lookup(categorical)
+            if index_rows is not None and (best is None or len(index_rows) < best[0]):
+                best = (len(index_rows), lambda: index_rows, set(categorical) - set(residual))
+        
+        if best is None:
+            return apply_filter_expr(self.data, build_filter_expr(values))
+        
+        _, take_rows, handled = best
+        remaining = {k: v for k, v in values.items() if k not in handled}
+        return apply_filter_expr(self.data[take_rows()], build_filter_expr(remaining))
+
+    def apply_filters(
+        self,
+        df: Optional[FrameLike] = None,
+        values: Optional[Dict[str, Any]] = None
+    ) -> FrameLike:
+        """
+        ✅ 一次性应用所有维度过滤（单次扫描，取代逐维度 filter 循环）
+        
+        Args:
+            df: DataFrame 或 LazyFrame，默认使用 from_data 传入的数据
+            values: 控件值字典，默认使用 self.data_values
+        
+        Returns:
+            与输入同类型的过滤结果（传入 LazyFrame 则返回 LazyFrame，可继续链式聚合后 collect）
+            若 from_data 时启用了 build_index 或存在日期区间维度，且 df 为源数据，则走索引路径，只收集命中行
+            属于 DashboardWorkspace 时，源数据 + 当前控件值的过滤结果由工作区计算一次、各仪表盘共用
+        
+        Examples:
+            >>> @pn.depends(*dashboard.widgets.values())
+            >>> def update(*args):
+            ...     filtered = dashboard.apply_filters(df)
+            ...     # 或惰性执行，过滤与聚合合并为一次查询：
+            ...     result = dashboard.apply_filters(df.lazy()).group_by(agg_axis).agg(...).collect()
+        """
+        if df is None:
+            if self.data is None:
+                raise ValueError("未指定数据：请传入 df，或使用 from_data() 创建仪表盘")
+            df = self.data
+        
+        with self._phase('filter'):
+            if self.workspace is not None and values is None and df is self.data:
+                return self.workspace.filtered()
+            values = self._normalize_ranges(self.data_values if values is None else values)
+            if df is self.data and (self.index is not None or self.range_dimensions):
+                return self._filter_source(values)
+            return apply_filter_expr(df, build_filter_expr(values))
+
+
+    def enable_profiling(self, **kwargs) -> "PanelDashboardBuilder":
+        """
+        启用回调耗时诊断：记录各阶段耗时与按状态的分位数，布局中增加可开关的诊断面板
+        
+        Args:
+            **kwargs: 传递给 CallbackProfiler 的参数（slow_ms, capture_plans, profiler, window）
+        
+        Examples:
+            >>> dashboard.enable_profiling(slow_ms=300, capture_plans=True, profiler="cprofile")
+            >>> # 分析逻辑中可手动标记阶段：
+            >>> with dashboard.profiler.phase('aggregate'):
+            ...     result = dashboard.profiler.capture_plan(lf.group_by(...).agg(...)).collect()
+        """
+        self.profiler = CallbackProfiler(**kwargs)
+        return self
+
+    def _phase(self, name: str):
+        """诊断计时上下文（未启用诊断时为空操作）"""
+        return self.profiler.phase(name) if self.profiler is not None else nullcontext()
+
+    def widget_state(self):
+        """全部控件（含聚合维度等非数据控件）的当前状态键"""
+        return state_key({k: w.value for k, w in self.widgets.items()})
+
+    def _profile_callback(self):
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.callback(self.widget_state())
+
+    def _measure_serialization(self, result: Any):
+        """启用诊断时测量图表 JSON 序列化耗时（与下发给浏览器的开销相当）"""
+        if self.profiler is None:
+            return
+        with self._phase('serialize'):
+            for fig in (result if isinstance(result, list) else [result]):
+                if isinstance(fig, go.Figure):
+                    pio.to_json(fig, validate=False)
+
+    def set_update_function(self, func: Callable, base_figure: Optional[go.Figure] = None):
         """
         设置更新函数
         
         Args:
             func: 更新函数，应该用 @pn.depends 装饰
+            base_figure: 传入则启用 patch 模式：图表只创建一次，更新函数只返回新的
+                trace 数据，输出面板原地更新，避免每次回调重建并整体下发图表 JSON
         
         Examples:
             >>> @pn.depends(*dashboard.widgets.values())
@@ -222,48 +475,258 @@ class PanelDashboardBuilder:
             ...     return fig
             >>> 
             >>> dashboard.set_update_function(update)
+            >>> 
+            >>> # patch 模式：返回与 base_figure.data 一一对应的 trace 更新
+            >>> fig = go.Figure(go.Bar(x=[], y=[]))
+            >>> def update_patch(*args):
+            ...     result = dashboard.apply_filters().group_by(agg_axis).agg(...)
+            ...     return [trace_data(result, x=agg_axis, y='保费')]  # from src.visualization
+            >>> 
+            >>> dashboard.set_update_function(update_patch, base_figure=fig)
         """
         self.update_function = func
+        self.base_figure = base_figure
         
         # 如果已经有渲染好的输出面板，立即通知它更新函数引用
         if self._output_pane is not None:
             print("🔄 检测到活跃仪表盘，正在热重载分析逻辑...")
             try:
-                # 重新构建输出面板的内容而不改变面板对象本身
-                self._output_pane.object = func
+                # 替换布局中的输出面板（依赖的控件与 patch 模式可能随更新函数变化）
+                old_pane = self._output_pane
+                self._install_output()
+                if self.layout is not None:
+                    self.layout[self.layout.objects.index(old_pane)] = self._output_pane
                 print("✅ 分析逻辑已热重载，请操作控件查看效果！")
             except Exception as e:
                 print(f"⚠️ 热重载失败 (可能布局尚未渲染): {e}")
                 
         return self
+
+    def apply_patch(self, patch: Any) -> go.Figure:
+        """
+        将更新函数返回的 patch 原地应用到 base_figure
+        
+        Args:
+            patch: 以下格式之一
+                - [trace_update, ...]: 与 base_figure.data 顺序对应的 dict（None 表示不变）
+                - {'data': [...], 'layout': {...}}: 同时更新 trace 与布局
+        
+        Returns:
+            更新后的 base_figure
+        """
+        if self.base_figure is None:
+            raise ValueError("未启用 patch 模式：请在 set_update_function() 中传入 base_figure")
+        
+        if isinstance(patch, dict):
+            trace_updates = patch.get('data', [])
+            layout_update = patch.get('layout')
+        else:
+            trace_updates = patch or []
+            layout_update = None
+        
+        with self.base_figure.batch_update():
+            for trace, update in zip(self.base_figure.data, trace_updates):
+                if update:
+                    trace.update(update)
+            if layout_update:
+                self.base_figure.layout.update(layout_update)
+        
+        return self.base_figure
+
+    def _widget_args(self) -> List[Any]:
+        """按 @pn.depends(*dashboard.widgets.values()) 的顺序取控件值"""
+        return [widget.value for widget in self.widgets.values()]
+
+    def _postprocess(self, result: Any) -> Any:
+        """下发前处理更新函数的输出：对超大 trace 降采样"""
+        figures = result if isinstance(result, list) else [result]
+        with self._phase('downsample'):
+            for fig in figures:
+                if isinstance(fig, go.Figure):
+                    downsample_figure(fig, self.max_points, self.max_categories)
+        return result
+
+    def _update_dependencies(self, func: Callable):
+        """
+        更新函数依赖的 (对象, 参数名)：@pn.depends 声明的位置参数与关键字参数，未声明时为全部控件的 value
+
+        Returns:
+            ([(对象, 参数名), ...], {关键字: (对象, 参数名)})
+        """
+        def resolve(dep):
+            if isinstance(dep, param.Parameter):
+                return dep.owner, dep.name
+            return dep, 'value'
+        
+        dinfo = getattr(func, '_dinfo', None)
+        if not dinfo:
+            return [(widget, 'value') for widget in self.widgets.values()], {}
+        return [resolve(d) for d in dinfo['dependencies']], {k: resolve(d) for k, d in dinfo['kw'].items()}
+
+    def _render(self) -> Any:
+        """普通模式下按依赖取参数执行一次更新函数，输出经 _postprocess 处理并记录产物"""
+        func = self.update_function
+        args, kw = self._update_dependencies(func)
+        state = self.widget_state()
+        with self._profile_callback(), capture() as tables:
+            result = self._postprocess(func(
+                *[getattr(obj, name) for obj, name in args],
+                **{key: getattr(obj, name) for key, (obj, name) in kw.items()}
+            ))
+            self._measure_serialization(result)
+        self.artifacts = ReportArtifacts(state, as_figures(result), tables)
+        return result
+
+    def _run_patch(self):
+        """patch 模式下执行一次更新函数，原地更新 base_figure 并记录产物"""
+        state = self.widget_state()
+        with capture() as tables:
+            self._postprocess(self.apply_patch(self.update_function(*self._widget_args())))
+        self.artifacts = ReportArtifacts(state, [self.base_figure], tables)
+
+    def _build_output(self, defer: bool = False):
+        """
+        构建输出面板及其控件监听（不改动仪表盘状态：由调用方保存，或用完后取消监听）
+        
+        普通模式为承载更新函数输出的容器；patch 模式为单个持久的 Plotly 面板，原地更新。
+        
+        Args:
+            defer: 先显示加载占位，首帧在页面加载后再计算。服务端在会话加载后执行；
+                Jupyter 中没有服务端文档，pn.state.onload 会立即执行回调，因此注册为协程：
+                排入内核事件循环，待单元格输出显示后再计算
+        
+        Returns:
+            (输出面板, [(对象, 监听), ...])
+        """
+        if self.base_figure is None:
+            pane = pn.Column(pn.Spacer(height=300), sizing_mode='stretch_width', loading=defer)
+            args, kw = self._update_dependencies(self.update_function)
+            dependencies = args + list(kw.values())
+            
+            def refresh():
+                result = self._render()
+                current = pane.objects[0] if len(pane.objects) == 1 else None
+                if isinstance(current, pn.pane.PaneBase) and type(current) is pn.pane.PaneBase.get_pane_type(result):
+                    # 同类型面板原地替换对象（如 Plotly 图表），不重建前端组件
+                    current.object = result
+                else:
+                    pane.objects = [pn.panel(result, sizing_mode='stretch_width')]
+        else:
+            pane = pn.pane.Plotly(self.base_figure, sizing_mode='stretch_width', loading=defer)
+            dependencies = [(widget, 'value') for widget in self.widgets.values()]
+            
+            def refresh():
+                with self._profile_callback():
+                    self._run_patch()
+                    self._measure_serialization(self.base_figure)
+                pane.param.trigger('object')
+        
+        def on_change(*events):
+            try:
+                refresh()
+            except Exception as e:
+                print(f"❌ 图表更新失败: {e}")
+        
+        unique = []
+        for obj, name in dependencies:
+            if not any(obj is o and name == n for o, n in unique):
+                unique.append((obj, name))
+        watchers = [(obj, obj.param.watch(on_change, name)) for obj, name in unique]
+        
+        def first_render():
+            refresh()
+            pane.loading = False
+        
+        async def deferred_render():
+            first_render()
+        
+        if defer:
+            pn.state.onload(deferred_render)
+        else:
+            first_render()
+        return pane, watchers
+
+    def _install_output(self, defer: bool = False):
+        """替换仪表盘的输出面板：取消旧面板的控件监听，保存新面板及其监听"""
+        for obj, watcher in self._output_watchers:
+            obj.param.unwatch(watcher)
+        self._output_pane, self._output_watchers = self._build_output(defer)
+        return self._output_pane
     
-    def build_layout(self):
-        """构建仪表盘布局"""
+    def build_layout(self, defer: bool = True):
+        """
+        构建仪表盘布局
+        
+        Args:
+            defer: 控件栏立即显示，首帧图表在页面加载（Jupyter 中为单元格输出显示）后计算，
+                默认选择较重时页面不再卡住
+        """
         if self.update_function is None:
             raise ValueError("请先使用 set_update_function() 设置更新函数")
         
+        # 输出区域 (核心：保持对象引用以支持热更新)
+        self._install_output(defer)
+        self._deferred = defer
+        
+        self.layout = self._compose_layout(self._output_pane)
+        if self.profiler is not None:
+            self.layout.append(self._build_diagnostics())
+        
+        return self.layout
+
+    def _compose_layout(self, output) -> pn.Column:
+        """标题 + 控件栏 + 输出区域"""
         # 标题
         title_pane = pn.pane.Markdown(f"# {self.title}", sizing_mode='stretch_width')
         
         # 控件区域（水平排列，自动换行）
+        # 工作区共享的控件由工作区统一放置
+        shared = self.workspace.widgets if self.workspace is not None else {}
         controls = pn.FlexBox(
-            *self.widgets.values(),
+            *[
+                self.searchers[name].layout if name in self.searchers else widget
+                for name, widget in self.widgets.items()
+                if name not in shared
+            ],
             sizing_mode='stretch_width'
         )
         
-        # 输出区域 (核心：保持对象引用以支持热更新)
-        self._output_pane = pn.panel(self.update_function, sizing_mode='stretch_width')
-        output = self._output_pane
-        
         # 完整布局
-        self.layout = pn.Column(
+        return pn.Column(
             title_pane,
             controls,
             output,
             sizing_mode='stretch_width'
         )
+
+    def _build_export_layout(self):
+        """
+        静态导出用的独立布局：首帧同步计算，不替换正在显示的布局、输出面板与控件监听
         
-        return self.layout
+        Returns:
+            (布局, [(对象, 监听), ...])，导出完成后需取消这些监听
+        """
+        pane, watchers = self._build_output(defer=False)
+        return self._compose_layout(pane), watchers
+
+    def _build_diagnostics(self):
+        """可开关的诊断面板：打开时随每次回调刷新"""
+        toggle = pn.widgets.Toggle(name="🩺 诊断", value=False, width=120)
+        pane = pn.pane.Markdown(visible=False, sizing_mode='stretch_width')
+        
+        def refresh(*_):
+            if toggle.value:
+                pane.object = self.profiler.report()
+        
+        def on_toggle(event):
+            pane.visible = event.new
+            refresh()
+        
+        toggle.param.watch(on_toggle, 'value')
+        if self._diagnostics_listener is not None:
+            self.profiler.remove_listener(self._diagnostics_listener)
+        self._diagnostics_listener = self.profiler.on_record(refresh)
+        return pn.Column(toggle, pane, sizing_mode='stretch_width')
     
     def show(self):
         """在 Jupyter Notebook 中显示仪表盘"""
@@ -271,27 +734,47 @@ class PanelDashboardBuilder:
             self.build_layout()
         return self.layout
     
-    def save(self, filename: str = "dashboard.html", embed: bool = True, **kwargs):
+    def save(
+        self,
+        filename: str = "dashboard.html",
+        embed: bool = True,
+        states: Optional[Dict[str, List[Any]]] = None,
+        **kwargs
+    ):
         """
         导出为静态 HTML
         
         Args:
             filename: 输出文件名
             embed: 是否嵌入所有资源（True = 单文件）
-            **kwargs: 传递给 Panel save() 的其他参数
+            states: 声明可达状态 {控件名: [取值, ...]}；传入则使用预计算导出引擎
+                （并行计算、输出去重），而非 Panel 的全组合 embed
+            **kwargs: 传递给 Panel save() 或 export_states() 的其他参数
         
         Examples:
             >>> dashboard.save("analysis.html")
             >>> dashboard.save("analysis.html", embed=True, title="分析报告")
+            >>> dashboard.save("analysis.html", states={'业务年度': ['全选', 2023, 2024]}, workers=4)
         """
-        if self.layout is None:
-            self.build_layout()
+        if states is not None:
+            return self.export_states(filename, states, **kwargs)
+        
+        watchers = []
+        if self.layout is not None and not self._deferred:
+            layout = self.layout
+        else:
+            # 静态导出需要首帧已渲染的布局；另建一份，正在显示的仪表盘继续响应控件
+            layout, watchers = self._build_export_layout()
         
         print(f"📤 导出仪表盘到: {filename}")
         print(f"   - 控件: {len(self.widgets)} 个")
         print(f"   - 嵌入资源: {'是' if embed else '否'}")
         
-        self.layout.save(filename, embed=embed, **kwargs)
+        try:
+            layout.save(filename, embed=embed, **kwargs)
+        finally:
+            for obj, watcher in watchers:
+                obj.param.unwatch(watcher)
         
         print(f"✅ 导出完成！")
         print(f"💡 用浏览器打开 {filename} 查看")
@@ -301,18 +784,145 @@ class PanelDashboardBuilder:
         
         return filename
     
-    def serve(self, port: int = 5006, **kwargs):
+    def export_states(
+        self,
+        filename: str,
+        states: Dict[str, List[Any]],
+        workers: Optional[int] = None,
+        max_states: int = 1000,
+        max_size_mb: float = 200,
+        force: bool = False,
+        plotlyjs: str = "inline"
+    ) -> Optional[str]:
+        """
+        按声明的可达状态导出独立 HTML（并行预计算 + 输出去重）
+        
+        Args:
+            filename: 输出文件名
+            states: {控件名: [取值, ...]}，未声明的控件固定为当前值；MultiChoice 的取值为列表
+            workers: 工作进程数（默认按状态数自动选择，不超过 CPU 核数）
+            max_states: 状态数上限，超出时中止
+            max_size_mb: 预估文件大小上限（MB），超出时中止
+            force: 忽略上限检查
+            plotlyjs: "inline"（可离线）或 "cdn"
+        
+        Returns:
+            输出文件路径；超出上限中止时返回 None
+        
+        Examples:
+            >>> dashboard.export_states("年度分析.html", states={
+            ...     '业务年度': ['全选', 2023, 2024],
+            ...     '_aggregation_dimension': ['业务险种', '机构名称'],
+            ... }, workers=4)
+        """
+        if self.update_function is None:
+            raise ValueError("请先使用 set_update_function() 设置更新函数")
+        
+        print(f"📤 预计算导出仪表盘到: {filename}")
+        exporter = StateExporter(self, states)
+        return exporter.export(
+            filename,
+            workers=workers,
+            max_states=max_states,
+            max_size_mb=max_size_mb,
+            force=force,
+            plotlyjs=plotlyjs
+        )
+    
+    def export_cube(
+        self,
+        filename: str,
+        measures: Dict[str, str],
+        plotlyjs: str = "inline"
+    ) -> str:
+        """
+        导出预聚合立方体 + 浏览器端过滤运行时（离线 HTML 对所有过滤组合均可交互）
+        
+        文件大小与维度组合数（立方体行数）成正比，与控件状态数无关。
+        日期区间控件对应的维度在页面中同样以起止区间选择，初始范围与当前控件一致。
+        
+        Args:
+            filename: 输出文件名
+            measures: {字段名: 聚合方式}，聚合方式为 "sum" / "count" / "mean" / "min" / "max"
+            plotlyjs: "inline"（可离线）或 "cdn"
+        
+        Returns:
+            输出文件路径
+        
+        Examples:
+            >>> dashboard.export_cube("保费分析_离线版.html", measures={'总保费': 'sum', '保单': 'count'})
+        """
+        if self.data is None:
+            raise ValueError("未找到源数据：请使用 from_data() 创建仪表盘")
+        
+        print(f"📤 导出数据立方体到: {filename}")
+        exporter = CubeExporter(self.data, list(self.data_controls), measures, range_dimensions=self.range_dimensions)
+        defaults = self._normalize_ranges(self.data_values)
+        return exporter.export(filename, title=self.title, defaults=defaults, plotlyjs=plotlyjs)
+    
+    def serve(
+        self,
+        port: int = 5006,
+        factory: Optional[Callable[[Optional[pl.DataFrame]], "PanelDashboardBuilder"]] = None,
+        nthreads: Optional[int] = None,
+        num_procs: int = 1,
+        **kwargs
+    ):
         """
         启动本地服务器
         
         Args:
             port: 端口号
+            factory: 会话工厂 factory(data) -> 仪表盘；传入则每个浏览器会话构建独立的控件与输出，
+                data 为本仪表盘的源数据（进程内共享同一份，不复制）。
+                不传则所有会话共享当前布局（控件状态互相影响，仅适合单人使用）
+            nthreads: Panel 回调线程池大小（pn.config.nthreads），多人使用时避免回调排队
+            num_procs: 工作进程数（> 1 时需传入 factory）。源数据写出一次 Arrow IPC 文件
+                （Config.CACHE_PATH），各工作进程内存映射读取，不会产生 N 份数据副本。
+                依赖 fork，Windows 上不可用（start_jupyter.bat 环境请保持 1）
             **kwargs: 传递给 Panel serve() 的其他参数
+        
+        Examples:
+            >>> def make_dashboard(df):
+            ...     dashboard = PanelDashboardBuilder.from_data(df, dimensions=['业务年度', '机构名称'])
+            ...     @pn.depends(*dashboard.widgets.values())
+            ...     def update(*args):
+            ...         return bar(dashboard.apply_filters().group_by(...).agg(...), x=..., y=...)
+            ...     return dashboard.set_update_function(update)
+            >>> 
+            >>> dashboard = make_dashboard(df)
+            >>> dashboard.serve(port=5006, factory=make_dashboard, nthreads=4)
+            >>> dashboard.server_stats.report()
+            >>> 
+            >>> # 多进程：4 个工作进程共享同一端口与同一份内存映射数据
+            >>> dashboard.serve(port=5006, factory=make_dashboard, num_procs=4)
         """
-        if self.layout is None:
-            self.build_layout()
+        if num_procs > 1 and factory is None:
+            raise ValueError("多进程模式需要传入 factory：每个工作进程按会话构建仪表盘")
+        
+        if nthreads is not None:
+            pn.config.nthreads = nthreads
         
         print(f"🚀 启动仪表盘服务...")
         print(f"🌐 访问: http://localhost:{port}")
         
-        self.layout.show(port=port, **kwargs)
+        if factory is None:
+            print("⚠️  未传入 factory：所有会话共享同一组控件状态")
+            if self.layout is None:
+                self.build_layout()
+            return self.layout.show(port=port, **kwargs)
+        
+        if num_procs > 1:
+            return serve_processes(
+                factory, self.data, port, num_procs,
+                nthreads=nthreads, data_dir=Config.CACHE_PATH / "serving", title=self.title, **kwargs
+            )
+        
+        self.server_stats = SessionStats()
+        print(f"👥 多会话模式: 每个会话独立构建, 回调线程数 {pn.config.nthreads or 1}")
+        return pn.serve(
+            {'/': session_app(factory, self.data, self.server_stats)},
+            port=port,
+            title=self.title,
+            **kwargs
+        )
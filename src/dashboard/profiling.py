@@ -0,0 +1,264 @@
+"""
+仪表盘回调耗时诊断
+
+记录每次控件回调各阶段的耗时（过滤、聚合、绘图、降采样、序列化），
+按控件状态保留滚动分位数；回调超过阈值时可保存 cProfile / pyinstrument 快照
+与 Polars 查询计划，供诊断面板展示。
+
+阶段由两部分组成：
+- 框架自动计时：filter（apply_filters）、downsample、serialize / render
+- 分析逻辑中手动标记：with dashboard.profiler.phase('aggregate'): ...
+未被任何阶段覆盖的耗时计入"其他"。
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+import polars as pl
+
+try:
+    from pyinstrument import Profiler as _PyInstrumentProfiler
+except ImportError:  # 可选依赖
+    _PyInstrumentProfiler = None
+
+OTHER_PHASE = '其他'
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, (list, tuple, set)):
+        return tuple(value)
+    return value
+
+
+def state_key(values: Dict[str, Any]) -> Hashable:
+    """控件值字典 → 可哈希的状态键"""
+    return tuple((name, _freeze(value)) for name, value in values.items())
+
+
+def format_state(state: Hashable) -> str:
+    return ", ".join(
+        f"{name}={list(value) if isinstance(value, tuple) else value}" for name, value in state
+    )
+
+
+class CallbackProfiler:
+    """
+    回调耗时分析器（线程安全，每个线程独立记录当前回调）
+
+    Examples:
+        >>> dashboard.enable_profiling(slow_ms=300, capture_plans=True)
+        >>> @pn.depends(*dashboard.widgets.values())
+        >>> def update(*args):
+        ...     lf = dashboard.apply_filters(df.lazy())           # 自动计入 filter
+        ...     with dashboard.profiler.phase('aggregate'):
+        ...         result = dashboard.profiler.capture_plan(lf.group_by(...).agg(...)).collect()
+        ...     with dashboard.profiler.phase('figure'):
+        ...         return bar(result, x=..., y=...)
+        >>> print(dashboard.profiler.report())
+    """
+
+    def __init__(
+        self,
+        window: int = 100,
+        slow_ms: float = 500.0,
+        capture_plans: bool = False,
+        profiler: Optional[str] = None,
+        max_snapshots: int = 5
+    ):
+        """
+        Args:
+            window: 每个状态保留的最近耗时样本数
+            slow_ms: 慢回调阈值（毫秒），超过时保存快照
+            capture_plans: 是否记录 capture_plan() 传入的 Polars 查询计划
+            profiler: 慢回调的采样方式 "cprofile" / "pyinstrument" / None（不采样）
+            max_snapshots: 保留的慢回调快照数
+        """
+        if profiler == 'pyinstrument' and _PyInstrumentProfiler is None:
+            print("⚠️  未安装 pyinstrument，改用 cProfile")
+            profiler = 'cprofile'
+        if profiler not in (None, 'cprofile', 'pyinstrument'):
+            raise ValueError(f"不支持的 profiler: {profiler}（可选: cprofile, pyinstrument）")
+
+        self.window = window
+        self.slow_ms = slow_ms
+        self.capture_plans = capture_plans
+        self.profiler = profiler
+        self.last: Optional[Dict[str, Any]] = None
+        self.snapshots = deque(maxlen=max_snapshots)
+        self._states: Dict[Hashable, deque] = {}
+        self._phases: Dict[str, deque] = {}
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # 锁、线程局部变量与界面监听无法 pickle（多进程导出会序列化整个仪表盘），反序列化时重建
+        state = self.__dict__.copy()
+        for name in ('_local', '_lock', '_listeners'):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._listeners = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def _record(self) -> Optional[Dict[str, Any]]:
+        return getattr(self._local, 'record', None)
+
+    @contextmanager
+    def phase(self, name: str):
+        """为当前回调中的一段代码计时（不在回调中时不做任何事）"""
+        record = self._record
+        if record is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            record['phases'][name] = record['phases'].get(name, 0.0) + elapsed
+
+    def capture_plan(self, lf: Any) -> Any:
+        """记录 LazyFrame 的优化后查询计划，原样返回 lf（可链式调用）"""
+        record = self._record
+        if record is not None and self.capture_plans and isinstance(lf, pl.LazyFrame):
+            record['plans'].append(lf.explain())
+        return lf
+
+    def on_record(self, listener: Callable[[Dict[str, Any]], None]):
+        """注册回调完成后的监听器（如刷新诊断面板）"""
+        self._listeners.append(listener)
+        return listener
+
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _start_sampling(self):
+        try:
+            if self.profiler == 'cprofile':
+                sampler = cProfile.Profile()
+                sampler.enable()
+                return sampler
+            if self.profiler == 'pyinstrument':
+                sampler = _PyInstrumentProfiler()
+                sampler.start()
+                return sampler
+        except (RuntimeError, ValueError):
+            # 同一时刻只能有一个分析器（并发回调时跳过采样）
+            return None
+        return None
+
+    def _stop_sampling(self, sampler, keep: bool) -> Optional[str]:
+        if sampler is None:
+            return None
+        if isinstance(sampler, cProfile.Profile):
+            sampler.disable()
+            if not keep:
+                return None
+            out = io.StringIO()
+            pstats.Stats(sampler, stream=out).sort_stats('cumulative').print_stats(25)
+            return out.getvalue()
+        sampler.stop()
+        return sampler.output_text(unicode=True) if keep else None
+
+    @contextmanager
+    def callback(self, state: Hashable):
+        """
+        包裹一次完整回调：记录总耗时与各阶段耗时（嵌套调用只记录最外层）
+
+        Args:
+            state: 控件状态键（见 state_key）
+        """
+        if self._record is not None:
+            yield self._record
+            return
+
+        record = {'state': state, 'phases': {}, 'plans': [], 'profile': None, 'time': time.time()}
+        self._local.record = record
+        sampler = self._start_sampling()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            total = (time.perf_counter() - start) * 1000
+            self._local.record = None
+            slow = total >= self.slow_ms
+            record['total_ms'] = total
+            record['phases'][OTHER_PHASE] = max(0.0, total - sum(record['phases'].values()))
+            record['profile'] = self._stop_sampling(sampler, slow)
+            self._store(record, slow)
+
+    def _store(self, record: Dict[str, Any], slow: bool):
+        with self._lock:
+            self.last = record
+            self._states.setdefault(record['state'], deque(maxlen=self.window)).append(record['total_ms'])
+            for name, elapsed in record['phases'].items():
+                self._phases.setdefault(name, deque(maxlen=self.window)).append(elapsed)
+            if slow:
+                self.snapshots.append(record)
+        for listener in self._listeners:
+            try:
+                listener(record)
+            except Exception as e:
+                print(f"⚠️ 诊断监听器出错: {e}")
+
+    def state_stats(self) -> List[Dict[str, Any]]:
+        """每个状态的耗时分位数，按 p95 降序"""
+        with self._lock:
+            items = [(state, np.asarray(samples)) for state, samples in self._states.items()]
+        stats = [
+            {
+                'state': state,
+                'count': len(samples),
+                'p50_ms': float(np.percentile(samples, 50)),
+                'p95_ms': float(np.percentile(samples, 95)),
+                'max_ms': float(samples.max()),
+            }
+            for state, samples in items
+        ]
+        return sorted(stats, key=lambda s: -s['p95_ms'])
+
+    def phase_stats(self) -> Dict[str, Dict[str, float]]:
+        """各阶段耗时分位数"""
+        with self._lock:
+            items = [(name, np.asarray(samples)) for name, samples in self._phases.items()]
+        return {
+            name: {'p50_ms': float(np.percentile(s, 50)), 'p95_ms': float(np.percentile(s, 95))}
+            for name, s in items
+        }
+
+    def report(self, top: int = 10) -> str:
+        """Markdown 格式的诊断报告"""
+        if self.last is None:
+            return "_暂无回调记录_"
+
+        lines = [f"**最近一次回调: {self.last['total_ms']:,.0f} ms**", "", "| 阶段 | 本次 (ms) | p50 | p95 |", "|---|---:|---:|---:|"]
+        phases = self.phase_stats()
+        for name, elapsed in self.last['phases'].items():
+            p = phases.get(name, {})
+            lines.append(f"| {name} | {elapsed:,.1f} | {p.get('p50_ms', 0):,.1f} | {p.get('p95_ms', 0):,.1f} |")
+
+        lines += ["", f"**按状态 (p95 最慢的 {top} 个)**", "", "| 状态 | 次数 | p50 (ms) | p95 (ms) |", "|---|---:|---:|---:|"]
+        for s in self.state_stats()[:top]:
+            lines.append(f"| {format_state(s['state'])} | {s['count']} | {s['p50_ms']:,.0f} | {s['p95_ms']:,.0f} |")
+
+        if self.snapshots:
+            snapshot = self.snapshots[-1]
+            lines += ["", f"**最近一次慢回调 ({snapshot['total_ms']:,.0f} ms ≥ {self.slow_ms:,.0f} ms): {format_state(snapshot['state'])}**"]
+            for plan in snapshot['plans']:
+                lines += ["", "查询计划:", "```", plan, "```"]
+            if snapshot['profile']:
+                lines += ["", "采样结果:", "```", snapshot['profile'].strip()[:4000], "```"]
+        return "\n".join(lines)
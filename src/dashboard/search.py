@@ -0,0 +1,106 @@
+"""
+高基数维度的服务端搜索
+
+对于机构名称、客户名称等成千上万个取值的维度，控件只下发出现频次最高的 top-N 选项，
+用户在搜索框输入时，由服务端前缀索引查询匹配项并更新控件选项，
+避免把全部取值塞进 Bokeh 文档。
+"""
+
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional
+
+import panel as pn
+import polars as pl
+
+from .filters import ALL_OPTION
+
+
+class PrefixIndex:
+    """
+    基于有序数组 + 二分查找的前缀索引（等价于压缩 Trie 的查询复杂度）
+
+    Examples:
+        >>> index = PrefixIndex(['北京分公司', '北京营业部', '上海分公司'])
+        >>> index.search('北京')
+        ['北京分公司', '北京营业部']
+    """
+
+    def __init__(self, values: Iterable[Any], counts: Optional[Dict[Any, int]] = None):
+        entries = sorted((str(v).casefold(), v) for v in values if v is not None)
+        self._keys = [key for key, _ in entries]
+        self._values = [value for _, value in entries]
+        self.counts = counts or {}
+        # 频次降序，作为无搜索词时的默认选项
+        self._by_frequency = sorted(self._values, key=lambda v: -self.counts.get(v, 0))
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def top(self, limit: int) -> List[Any]:
+        """出现频次最高的 limit 个取值"""
+        return self._by_frequency[:limit]
+
+    def search(self, prefix: str, limit: int = 100) -> List[Any]:
+        """返回以 prefix 开头的取值（不区分大小写），最多 limit 个"""
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return self.top(limit)
+
+        results = []
+        pos = bisect_left(self._keys, prefix)
+        while pos < len(self._keys) and len(results) < limit:
+            if not self._keys[pos].startswith(prefix):
+                break
+            results.append(self._values[pos])
+            pos += 1
+        return results
+
+
+class SearchableOptions:
+    """
+    将搜索框与 MultiChoice 控件绑定：输入时在服务端查询前缀索引，只下发匹配的选项
+
+    已选中的值始终保留在选项中，保证控件值合法。
+    """
+
+    def __init__(self, widget, index: PrefixIndex, top_n: int = 100, name: str = ""):
+        self.widget = widget
+        self.index = index
+        self.top_n = top_n
+        self.search_input = pn.widgets.TextInput(
+            name=f"🔍 搜索{name}",
+            placeholder=f"输入前缀搜索（共 {len(index):,} 个取值）",
+            sizing_mode='stretch_width'
+        )
+        self.search_input.param.watch(self._on_search, 'value_input')
+        self.refresh()
+
+    @classmethod
+    def from_series(cls, widget, series: pl.Series, top_n: int = 100) -> "SearchableOptions":
+        """从数据列构建（按出现频次确定默认 top-N）"""
+        counts = series.drop_nulls().value_counts(sort=True)
+        values = counts.get_column(series.name).to_list()
+        frequency = dict(zip(values, counts.get_column('count').to_list()))
+        return cls(widget, PrefixIndex(values, frequency), top_n=top_n, name=series.name)
+
+    def restrict(self, values: List[Any]):
+        """将候选取值限定为 values（供级联过滤使用）"""
+        self.index = PrefixIndex(values, self.index.counts)
+        self.refresh()
+
+    def refresh(self):
+        """按当前搜索词更新控件选项"""
+        self._on_search(None)
+
+    def _on_search(self, event):
+        text = self.search_input.value_input or ""
+        matches = self.index.search(text, limit=self.top_n)
+
+        selected = [v for v in self.widget.value if v != ALL_OPTION]
+        seen = set(selected)
+        self.widget.options = [ALL_OPTION] + selected + [v for v in matches if v not in seen]
+
+    @property
+    def layout(self):
+        """搜索框 + 控件的组合布局"""
+        return pn.Column(self.search_input, self.widget, sizing_mode='stretch_width')
@@ -0,0 +1,299 @@
+"""
+多用户仪表盘服务
+
+`layout.show()` 只服务一个预先构建好的布局对象：所有浏览器会话共享同一组控件状态。
+本模块为每个会话调用工厂函数构建独立的仪表盘（控件、输出面板各自独立），
+源数据在进程内只保留一份，以只读方式传给每个会话，不做复制。
+
+同时记录会话数与回调耗时，便于评估并发下的响应情况。
+
+多进程模式（num_procs > 1）：
+- 源数据写出一次未压缩的 Arrow IPC 文件，各工作进程以内存映射方式读取，
+  数据页由操作系统页缓存在进程间共享，N 个进程不会产生 N 份数据副本
+- 由一个新启动（spawn）的主进程调用 Bokeh 的多进程服务并 fork 出工作进程：
+  调用方进程已经运行过 Polars 查询，直接 fork 会使子进程中的 Polars 线程池死锁
+- 主进程自成一个进程组并监视调用方进程：调用方退出（包括被 SIGKILL，如 Jupyter 内核重启）后，
+  删除共享数据文件并结束整个进程组，不留下占用端口的孤儿进程；启动时清理此前遗留的数据文件
+- 依赖 fork 与进程组，Windows 上不可用（仅支持单进程服务）
+"""
+
+import functools
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import panel as pn
+import polars as pl
+import pyarrow as pa
+
+try:
+    import cloudpickle
+except ImportError:  # 旧版 joblib 自带 cloudpickle
+    from joblib.externals import cloudpickle
+
+
+class SessionStats:
+    """
+    服务端会话与延迟统计（线程安全，回调可能在 Panel 线程池中并发执行）
+
+    Examples:
+        >>> stats = SessionStats()
+        >>> update = stats.timed(update)  # 记录每次回调耗时
+        >>> stats.summary()
+        {'active_sessions': 3, 'total_sessions': 12, 'callbacks': 240, ...}
+    """
+
+    def __init__(self, window: int = 1000):
+        """
+        Args:
+            window: 计算延迟分位数时保留的最近样本数
+        """
+        self._lock = threading.Lock()
+        self.active_sessions = 0
+        self.total_sessions = 0
+        self.callbacks = 0
+        self._build_times = deque(maxlen=window)
+        self._callback_times = deque(maxlen=window)
+
+    def session_created(self, build_seconds: float):
+        with self._lock:
+            self.active_sessions += 1
+            self.total_sessions += 1
+            self._build_times.append(build_seconds)
+
+    def session_destroyed(self, session_context):
+        with self._lock:
+            self.active_sessions = max(0, self.active_sessions - 1)
+
+    def record_callback(self, seconds: float):
+        with self._lock:
+            self.callbacks += 1
+            self._callback_times.append(seconds)
+
+    def timed(self, func: Callable) -> Callable:
+        """包装更新函数记录耗时（functools.wraps 会保留 @pn.depends 的依赖声明）"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record_callback(time.perf_counter() - start)
+        return wrapper
+
+    @staticmethod
+    def _percentiles(samples) -> Dict[str, Optional[float]]:
+        if not samples:
+            return {'p50_ms': None, 'p95_ms': None}
+        values = np.asarray(samples) * 1000
+        return {'p50_ms': float(np.percentile(values, 50)), 'p95_ms': float(np.percentile(values, 95))}
+
+    def summary(self) -> Dict[str, Any]:
+        """当前统计快照"""
+        with self._lock:
+            build = self._percentiles(list(self._build_times))
+            callback = self._percentiles(list(self._callback_times))
+            return {
+                'active_sessions': self.active_sessions,
+                'total_sessions': self.total_sessions,
+                'callbacks': self.callbacks,
+                'session_build_p50_ms': build['p50_ms'],
+                'callback_p50_ms': callback['p50_ms'],
+                'callback_p95_ms': callback['p95_ms'],
+            }
+
+    def report(self) -> str:
+        """单行文本摘要"""
+        s = self.summary()
+        fmt = lambda v: '-' if v is None else f"{v:,.0f}ms"
+        return (
+            f"在线 {s['active_sessions']} / 累计 {s['total_sessions']} 个会话, "
+            f"回调 {s['callbacks']:,} 次 (p50 {fmt(s['callback_p50_ms'])}, p95 {fmt(s['callback_p95_ms'])}), "
+            f"会话构建 p50 {fmt(s['session_build_p50_ms'])}"
+        )
+
+
+def session_app(factory: Callable[..., Any], data: Any, stats: SessionStats) -> Callable[[], Any]:
+    """
+    生成 Panel 会话入口：每个浏览器会话调用一次，返回该会话独立的布局
+
+    Args:
+        factory: factory(data) -> PanelDashboardBuilder（已设置更新函数）
+        data: 进程内共享的只读数据，原样传给工厂函数
+        stats: 统计对象
+    """
+    def app():
+        start = time.perf_counter()
+        dashboard = factory(data)
+        if dashboard.update_function is not None:
+            dashboard.update_function = stats.timed(dashboard.update_function)
+        layout = dashboard.build_layout()
+        stats.session_created(time.perf_counter() - start)
+
+        pn.state.on_session_destroyed(stats.session_destroyed)
+        print(f"👤 新会话 [pid {os.getpid()}]: {stats.report()}")
+        return layout
+
+    return app
+
+
+_shared_frames: Dict[str, pl.DataFrame] = {}
+
+
+def write_shared_frame(df: pl.DataFrame, path: Path) -> Path:
+    """将数据写为未压缩的 Arrow IPC 文件（压缩后无法内存映射）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.write_ipc(path, compression='uncompressed')
+    return path
+
+
+def read_shared_frame(path: Path) -> pl.DataFrame:
+    """
+    以内存映射方式读取 Arrow IPC 文件（同一进程内只映射一次）
+
+    经 pyarrow 映射后零拷贝转换为 Polars（rechunk=False），数据页属于文件缓存而非进程私有内存。
+    """
+    key = str(path)
+    if key not in _shared_frames:
+        table = pa.ipc.open_file(pa.memory_map(key)).read_all()
+        _shared_frames[key] = pl.from_arrow(table, rechunk=False)
+    return _shared_frames[key]
+
+
+SHARED_FILE_PREFIX = 'serving_'
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def remove_stale_frames(data_dir: Path) -> int:
+    """删除创建进程已不存在的共享数据文件（serving_<pid>_*.arrow），返回删除的文件数"""
+    removed = 0
+    for path in Path(data_dir).glob(f"{SHARED_FILE_PREFIX}*_*.arrow"):
+        pid = path.stem[len(SHARED_FILE_PREFIX):].split('_', 1)[0]
+        if pid.isdigit() and not _pid_alive(int(pid)):
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def _exit_with_parent(parent_pid: int, data_path: Optional[str], interval: float = 1.0):
+    """
+    监视线程：调用方进程退出后删除共享数据文件，并结束本进程组（主进程 + fork 出的工作进程）
+
+    轮询 os.getppid()：父进程退出后子进程被重新挂到 init / subreaper 下，ppid 随之改变。
+    """
+    def watch():
+        while os.getppid() == parent_pid:
+            time.sleep(interval)
+        if data_path:
+            Path(data_path).unlink(missing_ok=True)
+        os.killpg(os.getpgrp(), signal.SIGTERM)
+
+    threading.Thread(target=watch, name='parent-watchdog', daemon=True).start()
+
+
+def _stop_process_group(process: multiprocessing.Process):
+    """结束主进程及其 fork 出的工作进程（主进程尚未建立进程组时只结束主进程）"""
+    try:
+        if os.getpgid(process.pid) == process.pid:
+            os.killpg(process.pid, signal.SIGTERM)
+            return
+    except ProcessLookupError:
+        return
+    process.terminate()
+
+
+def _serve_processes(
+    factory_payload: bytes,
+    data_path: Optional[str],
+    port: int,
+    num_procs: int,
+    nthreads: Optional[int],
+    kwargs: Dict[str, Any],
+    parent_pid: int
+):
+    """多进程服务主进程入口（spawn 启动，fork 前不执行任何 Polars 查询）"""
+    # 自成进程组：工作进程随之继承，可整体结束而不影响调用方进程
+    os.setpgrp()
+    _exit_with_parent(parent_pid, data_path)
+    factory = cloudpickle.loads(factory_payload)
+    if nthreads is not None:
+        pn.config.nthreads = nthreads
+    # fork 后每个工作进程持有独立的统计副本
+    stats = SessionStats()
+
+    def app():
+        data = read_shared_frame(Path(data_path)) if data_path else None
+        return session_app(factory, data, stats)()
+
+    pn.serve({'/': app}, port=port, num_procs=num_procs, show=False, **kwargs)
+
+
+def serve_processes(
+    factory: Callable[..., Any],
+    data: Optional[pl.DataFrame],
+    port: int,
+    num_procs: int,
+    nthreads: Optional[int] = None,
+    data_dir: Optional[Path] = None,
+    **kwargs
+):
+    """
+    多进程服务：共享端口，工作进程内存映射同一份数据文件
+
+    调用方进程退出（包括被强制结束）时服务随之停止并删除数据文件；Windows 不支持（需要 fork）。
+
+    Args:
+        factory: 会话工厂 factory(data) -> 仪表盘（会被 cloudpickle 序列化到工作进程，
+            应只通过参数使用数据，而非引用外部的大数据变量）
+        data: 源数据，写出一次后由工作进程内存映射
+        port: 端口号
+        num_procs: 工作进程数
+        nthreads: 每个工作进程的回调线程数
+        data_dir: 数据文件目录
+        **kwargs: 传递给 Panel serve() 的其他参数
+    """
+    if sys.platform == 'win32':
+        raise RuntimeError("多进程服务（num_procs > 1）依赖 fork，Windows 上不可用，请使用 num_procs=1")
+
+    data_path = None
+    if data is not None:
+        start = time.perf_counter()
+        removed = remove_stale_frames(Path(data_dir))
+        if removed:
+            print(f"🧹 已清理 {removed} 个遗留的共享数据文件")
+        data_path = write_shared_frame(data, Path(data_dir) / f"{SHARED_FILE_PREFIX}{os.getpid()}_{id(data):x}.arrow")
+        size_mb = data_path.stat().st_size / 1024 / 1024
+        print(f"💾 共享数据文件: {data_path} ({size_mb:,.1f} MB, 耗时 {time.perf_counter() - start:.1f}s)")
+
+    process = multiprocessing.get_context('spawn').Process(
+        target=_serve_processes,
+        args=(cloudpickle.dumps(factory), str(data_path) if data_path else None,
+              port, num_procs, nthreads, kwargs, os.getpid()),
+    )
+    process.start()
+    print(f"👥 多进程模式: {num_procs} 个工作进程, 主进程 pid {process.pid}")
+    try:
+        process.join()
+    except KeyboardInterrupt:
+        print("🛑 正在停止服务...")
+        _stop_process_group(process)
+        process.join()
+    finally:
+        if data_path is not None:
+            data_path.unlink(missing_ok=True)
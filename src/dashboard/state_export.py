@@ -0,0 +1,248 @@
+"""
+预计算状态导出引擎
+
+Panel 的 `save(embed=True)` 会对所有控件取值做全组合，并在当前进程内串行重算，
+多个 MultiChoice 时组合数爆炸。本模块只枚举调用方声明的可达状态：
+1. 开始前报告状态数与预估文件大小（超出上限时中止）
+2. 在多个工作进程中并行计算每个状态的图表（joblib/loky 派生进程，仪表盘连同闭包按值序列化；
+   不使用 fork，Polars 线程池在 fork 出的子进程中会死锁）
+3. 对输出相同的状态去重，只嵌入一份图表 JSON
+4. 生成带下拉控件的独立 HTML，浏览器端按状态查表切换图表
+"""
+
+import copy
+import hashlib
+import html
+import itertools
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import param
+import plotly.graph_objects as go
+import plotly.io as pio
+from joblib import Parallel, delayed
+
+
+def _compute_chunk(exporter: "StateExporter", indices: List[int]) -> List[Tuple[int, str]]:
+    """工作进程入口：每个进程收到一份仪表盘副本，批量计算一组状态"""
+    return [(index, exporter.compute_state(index)) for index in indices]
+
+
+def _format_option(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value)
+    return str(value)
+
+
+class StateExporter:
+    """
+    按声明的状态集合导出仪表盘
+
+    Examples:
+        >>> exporter = StateExporter(dashboard, states={
+        ...     '业务年度': ['全选', 2023, 2024],
+        ...     '_aggregation_dimension': ['业务险种', '机构名称'],
+        ... })
+        >>> exporter.estimate()
+        {'states': 6, 'estimated_bytes': 1843200}
+        >>> exporter.export('outputs/dashboard.html', workers=4)
+    """
+
+    def __init__(self, dashboard, states: Dict[str, List[Any]]):
+        unknown = [name for name in states if name not in dashboard.widgets]
+        if unknown:
+            raise ValueError(f"未知控件: {', '.join(unknown)}")
+
+        self.dashboard = dashboard
+        self.states = {name: list(values) for name, values in states.items()}
+        self._names = list(self.states)
+        self._combinations = list(itertools.product(*self.states.values()))
+        self._sample: Optional[str] = None
+
+    @property
+    def state_count(self) -> int:
+        return len(self._combinations)
+
+    def compute_state(self, index: int) -> str:
+        """计算第 index 个状态的图表 JSON（未声明的控件保持当前值）"""
+        widgets = self.dashboard.widgets
+        originals = {name: widgets[name].value for name in self._names}
+        # patch 模式下 apply_patch 会原地修改 base_figure：在副本上计算，
+        # 显示中的图表（及 dashboard.artifacts 记录的图表）保持不变
+        live_figure = getattr(self.dashboard, 'base_figure', None)
+        if live_figure is not None:
+            self.dashboard.base_figure = copy.deepcopy(live_figure)
+        try:
+            # 屏蔽监听器（级联、Panel 回调），只改值不触发联动
+            for name, value in zip(self._names, self._combinations[index]):
+                with param.parameterized.discard_events(widgets[name]):
+                    widgets[name].value = value
+
+            args = [widget.value for widget in widgets.values()]
+            result = self.dashboard.update_function(*args)
+            if getattr(self.dashboard, 'base_figure', None) is not None:
+                result = self.dashboard.apply_patch(result)
+            result = self.dashboard._postprocess(result)
+        finally:
+            if live_figure is not None:
+                self.dashboard.base_figure = live_figure
+            for name, value in originals.items():
+                with param.parameterized.discard_events(widgets[name]):
+                    widgets[name].value = value
+
+        figures = [fig for fig in (result if isinstance(result, list) else [result])
+                   if isinstance(fig, go.Figure)]
+        return "[" + ",".join(pio.to_json(fig, validate=False) for fig in figures) + "]"
+
+    def estimate(self) -> Dict[str, int]:
+        """以第一个状态的输出大小估算总大小（去重前的上限）"""
+        if self._sample is None and self._combinations:
+            self._sample = self.compute_state(0)
+        sample_size = len(self._sample.encode('utf-8')) if self._sample else 0
+        return {'states': self.state_count, 'estimated_bytes': sample_size * self.state_count}
+
+    def _compute_all(self, workers: int) -> List[str]:
+        outputs: List[Optional[str]] = [None] * self.state_count
+        pending = list(range(self.state_count))
+        if self._sample is not None:
+            outputs[0] = self._sample
+            pending = pending[1:]
+
+        if workers > 1 and len(pending) > 1:
+            # 每个进程一个分块，仪表盘只序列化一次 / 进程
+            chunks = [pending[i::workers] for i in range(workers) if pending[i::workers]]
+            results = Parallel(n_jobs=len(chunks), backend='loky')(
+                delayed(_compute_chunk)(self, chunk) for chunk in chunks
+            )
+            for chunk in results:
+                for index, output in chunk:
+                    outputs[index] = output
+        else:
+            for index in pending:
+                outputs[index] = self.compute_state(index)
+        return outputs
+
+    def export(
+        self,
+        filename: str,
+        workers: Optional[int] = None,
+        max_states: int = 1000,
+        max_size_mb: float = 200,
+        force: bool = False,
+        plotlyjs: str = "inline"
+    ) -> Optional[str]:
+        """
+        并行计算所有声明状态并写出独立 HTML
+
+        Args:
+            filename: 输出文件名
+            workers: 工作进程数（默认按状态数取不超过 CPU 核数，1 = 当前进程串行计算）
+            max_states: 状态数上限，超出时中止（force=True 跳过检查）
+            max_size_mb: 预估大小上限（MB），超出时中止（force=True 跳过检查）
+            force: 忽略上限检查
+            plotlyjs: "inline" 内嵌 plotly.js（可离线）或 "cdn"
+
+        Returns:
+            输出文件路径；超出上限中止时返回 None
+        """
+        estimate = self.estimate()
+        size_mb = estimate['estimated_bytes'] / 1024 / 1024
+        print(f"📐 预估: {estimate['states']:,} 个状态, 约 {size_mb:,.1f} MB（去重前）")
+
+        if not force and (estimate['states'] > max_states or size_mb > max_size_mb):
+            print(f"❌ 超出上限 (max_states={max_states}, max_size_mb={max_size_mb})，已中止")
+            print("💡 请减少声明的状态，或传入 force=True")
+            return None
+
+        if workers is None:
+            # 进程启动有固定开销（导入 Panel/Polars），状态较少时少开进程
+            workers = min(os.cpu_count() or 1, max(1, self.state_count // 20))
+        start = time.perf_counter()
+        outputs = self._compute_all(workers)
+
+        # 去重：相同输出只保留一份
+        payload_ids: Dict[str, int] = {}
+        payloads: List[str] = []
+        table: List[int] = []
+        for output in outputs:
+            digest = hashlib.sha1(output.encode('utf-8')).hexdigest()
+            if digest not in payload_ids:
+                payload_ids[digest] = len(payloads)
+                payloads.append(output)
+            table.append(payload_ids[digest])
+
+        elapsed = time.perf_counter() - start
+        print(f"✅ 计算完成: {len(outputs):,} 个状态 → {len(payloads):,} 份唯一图表, 耗时 {elapsed:.1f}s")
+
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(self._render_html(payloads, table, plotlyjs))
+
+        print(f"📤 已导出: {filename} ({os.path.getsize(filename) / 1024 / 1024:,.1f} MB)")
+        return filename
+
+    def _render_html(self, payloads: List[str], table: List[int], plotlyjs: str) -> str:
+        if plotlyjs == "inline":
+            from plotly.offline import get_plotlyjs
+            plotly_tag = f"<script>{get_plotlyjs()}</script>"
+        else:
+            plotly_tag = '<script src="https://cdn.plot.ly/plotly-latest.min.js"></script>'
+
+        controls = []
+        for i, (name, values) in enumerate(self.states.items()):
+            widget = self.dashboard.widgets[name]
+            label = html.escape(widget.name or name)
+            options = "".join(
+                f'<option value="{j}"{" selected" if v == widget.value else ""}>'
+                f'{html.escape(_format_option(v))}</option>'
+                for j, v in enumerate(values)
+            )
+            controls.append(f'<label>{label} <select data-dim="{i}">{options}</select></label>')
+
+        sizes = [len(values) for values in self.states.values()]
+        script_data = (
+            f"const PAYLOADS = [{','.join(payloads)}];\n"
+            f"const STATE_TABLE = {json.dumps(table)};\n"
+            f"const SIZES = {json.dumps(sizes)};\n"
+        ).replace("</", "<\\/")
+
+        return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{html.escape(self.dashboard.title)}</title>
+    {plotly_tag}
+    <style>
+        body {{ font-family: "Microsoft YaHei", Arial, sans-serif; margin: 20px; }}
+        .controls {{ display: flex; flex-wrap: wrap; gap: 16px; margin-bottom: 20px; }}
+        .chart {{ width: 100%; }}
+    </style>
+</head>
+<body>
+    <h1>{html.escape(self.dashboard.title)}</h1>
+    <div class="controls">{''.join(controls)}</div>
+    <div id="charts"></div>
+    <script>
+{script_data}
+        const selects = Array.from(document.querySelectorAll('select[data-dim]'));
+        function render() {{
+            // 状态按声明顺序做笛卡尔积，最后一个维度变化最快
+            let index = 0;
+            selects.forEach((sel, i) => {{ index = index * SIZES[i] + Number(sel.value); }});
+            const figures = PAYLOADS[STATE_TABLE[index]];
+            const container = document.getElementById('charts');
+            container.innerHTML = '';
+            figures.forEach(fig => {{
+                const div = document.createElement('div');
+                div.className = 'chart';
+                container.appendChild(div);
+                Plotly.newPlot(div, fig.data, fig.layout, {{responsive: true}});
+            }});
+        }}
+        selects.forEach(sel => sel.addEventListener('change', render));
+        render();
+    </script>
+</body>
+</html>
+"""
@@ -0,0 +1,173 @@
+"""
+多仪表盘工作区
+
+同一份数据上的多个仪表盘共用一组过滤控件：
+- 维度唯一值只扫描一次（一次 from_data），索引 / 级联也只构建一次
+- 控件变化时过滤结果只计算一次，按控件状态缓存，各仪表盘回调共用
+- 各仪表盘只各自执行聚合与绘图
+"""
+
+import threading
+from typing import Any, Dict, List, Optional
+
+import panel as pn
+import polars as pl
+
+from .panel_builder import PanelDashboardBuilder
+from .profiling import state_key
+
+
+class DashboardWorkspace:
+    """
+    共享数据与过滤控件的仪表盘工作区
+
+    Examples:
+        >>> workspace = DashboardWorkspace(df_df, dimensions=['业务年度', '机构名称'], title="经营分析")
+        >>> premium = workspace.add_dashboard("保费分析")
+        >>> @pn.depends(*premium.widgets.values())
+        >>> def update_premium(*args):
+        ...     agg_axis = premium.widgets['_aggregation_dimension'].value
+        ...     result = premium.apply_filters().group_by(agg_axis).agg(pl.col('总保费').sum())  # 共用过滤结果
+        ...     return bar(result, x=agg_axis, y='总保费')
+        >>> premium.set_update_function(update_premium)
+        >>>
+        >>> claims = workspace.add_dashboard("赔付分析")
+        >>> ...
+        >>> workspace.show()
+    """
+
+    def __init__(self, df: pl.DataFrame, dimensions: List[str], title: str = "数据分析工作区", **kwargs):
+        """
+        Args:
+            df: Polars DataFrame（各仪表盘共用，不复制）
+            dimensions: 共享过滤维度
+            title: 工作区标题
+            **kwargs: 传递给 PanelDashboardBuilder.from_data 的参数（build_index, cascade, search_threshold 等）
+        """
+        self.title = title
+        self.data = df
+        # 控件、索引、级联只创建一次，由所有仪表盘共享
+        self.controller = PanelDashboardBuilder.from_data(df, dimensions, title=title, **kwargs)
+        self.dimensions = list(self.controller.data_controls)
+        self.dashboards: List[PanelDashboardBuilder] = []
+        self.layout = None
+        self._lock = threading.Lock()
+        self._filtered_key = None
+        self._filtered: Optional[pl.DataFrame] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # 锁无法 pickle（成员仪表盘多进程导出时会连同工作区一起序列化）；过滤缓存不随之传输
+        state = self.__dict__.copy()
+        for name in ('_lock', '_filtered_key', '_filtered'):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._filtered_key = None
+        self._filtered = None
+
+    @property
+    def widgets(self) -> Dict[str, Any]:
+        """共享的数据维度控件"""
+        return self.controller.data_controls
+
+    @property
+    def data_values(self) -> Dict[str, Any]:
+        return self.controller.data_values
+
+    def filtered(self) -> pl.DataFrame:
+        """当前控件状态下的过滤结果（同一状态只计算一次）"""
+        values = self.data_values
+        key = state_key(values)
+        with self._lock:
+            if key != self._filtered_key:
+                self._filtered = self.controller.apply_filters(self.data, values)
+                self._filtered_key = key
+            return self._filtered
+
+    def add_dashboard(self, title: str, aggregation_dimension: bool = True) -> PanelDashboardBuilder:
+        """
+        添加一个仪表盘：共用工作区的过滤控件，apply_filters() 返回共享的过滤结果
+
+        Args:
+            title: 仪表盘标题
+            aggregation_dimension: 是否为该仪表盘创建独立的"聚合维度"选择器
+
+        Returns:
+            新的 PanelDashboardBuilder（之后照常 set_update_function）
+        """
+        dashboard = PanelDashboardBuilder(title=title)
+        dashboard.data = self.data
+        dashboard.workspace = self
+        dashboard.widgets = dict(self.widgets)
+        if aggregation_dimension and self.dimensions:
+            dashboard.widgets['_aggregation_dimension'] = pn.widgets.Select(
+                name="⚡️ 聚合维度（分组字段）",
+                options=self.dimensions,
+                value=self.dimensions[0]
+            )
+        self.dashboards.append(dashboard)
+        print(f"➕ 已添加仪表盘: {title}（共 {len(self.dashboards)} 个）")
+        return dashboard
+
+    def build_layout(self, ncols: int = 2, defer: bool = True):
+        """
+        构建工作区布局：共享控件栏 + 仪表盘网格
+
+        Args:
+            ncols: 每行仪表盘数量
+            defer: 各仪表盘首帧是否延迟到页面加载后计算
+        """
+        self._check_dashboards()
+        self.layout = self._compose_layout([dashboard.build_layout(defer=defer) for dashboard in self.dashboards], ncols)
+        return self.layout
+
+    def _check_dashboards(self):
+        missing = [d.title for d in self.dashboards if d.update_function is None]
+        if missing:
+            raise ValueError(f"以下仪表盘未设置更新函数: {', '.join(missing)}")
+
+    def _compose_layout(self, panels: List[Any], ncols: int) -> pn.Column:
+        """标题 + 共享控件栏 + 仪表盘网格"""
+        searchers = self.controller.searchers
+        controls = pn.FlexBox(
+            *[searchers[name].layout if name in searchers else widget for name, widget in self.widgets.items()],
+            sizing_mode='stretch_width'
+        )
+        grid = pn.GridBox(*panels, ncols=ncols, sizing_mode='stretch_width')
+        return pn.Column(
+            pn.pane.Markdown(f"# {self.title}", sizing_mode='stretch_width'),
+            controls,
+            grid,
+            sizing_mode='stretch_width'
+        )
+
+    def show(self):
+        """在 Jupyter Notebook 中显示工作区"""
+        if self.layout is None:
+            self.build_layout()
+        return self.layout
+
+    def save(self, filename: str = "workspace.html", embed: bool = True, ncols: int = 2, **kwargs):
+        """
+        导出为静态 HTML（首帧同步渲染）
+
+        各仪表盘另建一份导出用布局，正在显示的工作区不受影响，导出后取消导出布局的控件监听。
+        """
+        self._check_dashboards()
+        panels, watchers = [], []
+        for dashboard in self.dashboards:
+            layout, member_watchers = dashboard._build_export_layout()
+            panels.append(layout)
+            watchers.extend(member_watchers)
+
+        print(f"📤 导出工作区到: {filename}（{len(self.dashboards)} 个仪表盘）")
+        try:
+            self._compose_layout(panels, ncols).save(filename, embed=embed, **kwargs)
+        finally:
+            for obj, watcher in watchers:
+                obj.param.unwatch(watcher)
+        print(f"✅ 导出完成！")
+        return filename
@@ -1,18 +1,277 @@
+import io
 import os
 from datetime import datetime
 import plotly.io as pio
 import polars as pl
 from pathlib import Path
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # ReportLab 核心导入
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak, Table, TableStyle, Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+
+from config import Config
+from src.utils.artifacts import ReportArtifacts, as_figures, capture, recorded_artifacts
+from src.visualization.render import render_figures
+
+# 中文字体候选：(路径, .ttc 子字体序号)
+# ReportLab 只支持 TrueType 轮廓；CFF 轮廓的字体（如 NotoSansCJK-*.ttc）会注册失败并跳过
+FONT_CANDIDATES = [
+    ("/System/Library/Fonts/Hiragino Sans GB.ttc", 0),  # Mac - 东青黑体
+    ("/System/Library/Fonts/STHeiti Medium.ttc", 0),    # Mac - 华文黑体
+    ("C:\\Windows\\Fonts\\msyh.ttc", 0),                # Windows - 微软雅黑
+    ("C:\\Windows\\Fonts\\simhei.ttf", 0),              # Windows - 黑体
+    ("/usr/share/fonts/truetype/wqy/wqy-microhei.ttc", 0),        # Linux - 文泉驿微米黑
+    ("/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc", 0),          # Linux - 文泉驿正黑
+    ("/usr/share/fonts/wqy-microhei/wqy-microhei.ttc", 0),        # Linux (Fedora / Arch)
+    ("/usr/share/fonts/truetype/noto/NotoSansSC-Regular.ttf", 0),  # Linux - 思源黑体 TrueType 版
+    ("/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf", 0),
+]
+# 找不到字体文件时使用的 CID 字体：不嵌入字形，由阅读器提供，PDF 最小
+CID_FALLBACK_FONT = 'STSong-Light'
+
+_font_lock = threading.Lock()
+_registered_font = None
+
+
+def _register_chinese_font() -> str:
+    """
+    注册中文字体并返回字体名（进程内只解析一次字体文件，后续导出直接复用）
+
+    搜索顺序：Config.PDF_FONT_PATH → FONT_CANDIDATES → CID 字体 STSong-Light。
+    TrueType 字体由 ReportLab 按实际用到的字形子集嵌入，报告体积只与用到的汉字数量有关。
+    """
+    global _registered_font
+    with _font_lock:
+        if _registered_font is not None:
+            return _registered_font
+
+        candidates = list(FONT_CANDIDATES)
+        if Config.PDF_FONT_PATH:
+            candidates.insert(0, (Config.PDF_FONT_PATH, Config.PDF_FONT_SUBFONT_INDEX))
+
+        for font_path, subfont_index in candidates:
+            if not os.path.exists(font_path):
+                continue
+            try:
+                pdfmetrics.registerFont(TTFont('ChineseFont', font_path, subfontIndex=subfont_index))
+                print(f"✅ 成功加载中文字体: {font_path}")
+                _registered_font = 'ChineseFont'
+                return _registered_font
+            except Exception as e:
+                print(f"⚠️ 尝试加载 {font_path} 失败: {e}")
+
+        try:
+            pdfmetrics.registerFont(UnicodeCIDFont(CID_FALLBACK_FONT))
+            print(f"💡 未找到中文字体文件，使用内置 CID 字体 {CID_FALLBACK_FONT}（可通过 PDF_FONT_PATH 指定字体）")
+            _registered_font = CID_FALLBACK_FONT
+        except Exception as e:
+            print(f"⚠️ 警告: 未找到支持的中文字体: {e}")
+            _registered_font = 'Helvetica'
+        return _registered_font
+
+
+# 合计行识别（匹配首列）
+TOTAL_PATTERN = "合计|Total"
+
+# 完整表格模式下每个分块的行数（A4 页面约可容纳 40 行 8 号字）
+TABLE_CHUNK_ROWS = 40
+# 表格字号（表头 / 正文）与 ReportLab 单元格默认左右内边距之和
+TABLE_HEADER_FONT_SIZE = 10
+TABLE_FONT_SIZE = 8
+TABLE_CELL_PADDING = 12
+# 超过该绝对值的浮点数定点转换不再精确（乃至溢出 Decimal），交给 Python 格式化
+EXACT_FLOAT_LIMIT = 1e13
+
+
+def _thousands(digits: pl.Expr) -> pl.Expr:
+    """非负整数字符串加千分位：反转后每 3 位插入逗号再反转回来"""
+    return (
+        digits.str.reverse()
+        .str.replace_all(r"(\d{3})", "$1,")
+        .str.strip_chars_end(",")
+        .str.reverse()
+    )
+
+
+def _format_column(name: str, dtype: pl.DataType) -> pl.Expr:
+    """按列类型格式化为字符串：浮点数千分位 + 两位小数，整数千分位，空值显示 "-" """
+    col = pl.col(name)
+    sign = pl.when(col < 0).then(pl.lit("-")).otherwise(pl.lit(""))
+    if dtype.is_float():
+        # 定点小数转字符串后拆出整数部分加千分位；超出精确范围的大数不做转换，由 _format_exact 补齐
+        bounded = pl.when(col.abs() < EXACT_FLOAT_LIMIT).then(col.abs())
+        fixed = bounded.cast(pl.Decimal(38, 2), strict=False).cast(pl.String)
+        text = (
+            pl.when(col.is_nan()).then(pl.lit("nan"))
+            .when(col.is_infinite()).then(sign + pl.lit("inf"))
+            .otherwise(sign + _thousands(fixed.str.head(-3)) + fixed.str.tail(3))
+        )
+    elif dtype.is_integer():
+        # 从字符串中去掉负号取数字部分（对最小值取 abs 会溢出）
+        text = sign + _thousands(col.cast(pl.String).str.strip_chars_start("-"))
+    elif dtype == pl.Boolean:
+        text = pl.when(col).then(pl.lit("True")).otherwise(pl.lit("False"))
+    elif dtype == pl.Datetime:
+        text = col.dt.to_string("%Y-%m-%d %H:%M:%S")
+    else:
+        text = col.cast(pl.String)
+    return pl.when(col.is_null()).then(pl.lit("-")).otherwise(text).alias(name)
+
+
+def _needs_exact(name: str) -> pl.Expr:
+    """
+    定点转换可能与 f"{v:,.2f}" 不一致的浮点值：超出精确范围的大数、-0.0，
+    以及第三位小数恰好落在舍入边界附近的值（Python 按二进制精确值舍入，如 2.675 → 2.67）
+    """
+    col = pl.col(name)
+    scaled = col.abs() * 100
+    near_half = (scaled - scaled.floor() - 0.5).abs() <= scaled * 1e-12 + 1e-9
+    negative_zero = (col == 0) & (1.0 / col < 0)
+    return ((col.abs() >= EXACT_FLOAT_LIMIT) | near_half | negative_zero).fill_null(False)
+
+
+def _format_exact(formatted: pl.DataFrame, values: pl.Series) -> pl.DataFrame:
+    """少数向量化结果可能不一致的浮点单元格改用 Python 格式化，保证与逐值格式化输出一致"""
+    rows = values.to_frame().select(_needs_exact(values.name)).to_series().arg_true()
+    if rows.is_empty():
+        return formatted
+    column = formatted.get_column(values.name).clone()
+    column.scatter(rows, [f"{v:,.2f}" for v in values.gather(rows).to_list()])
+    return formatted.with_columns(column)
+
+
+def _format_cells(df: pl.DataFrame) -> pl.DataFrame:
+    """整表按列向量化格式化，返回全部为字符串列的 DataFrame"""
+    columns = []
+    for name, dtype in df.schema.items():
+        if dtype.is_nested() or dtype == pl.Object:
+            # 嵌套类型无法转为字符串表达式，逐值转换（少见）
+            values = ["-" if v is None else str(v) for v in df.get_column(name).to_list()]
+            columns.append(pl.Series(name, values, dtype=pl.String))
+        else:
+            columns.append(_format_column(name, dtype))
+    formatted = df.select(columns)
+    for name, dtype in df.schema.items():
+        if dtype.is_float():
+            formatted = _format_exact(formatted, df.get_column(name))
+    return formatted
+
+
+def _build_table(body: pl.DataFrame, font_name: str, col_widths=None, highlight_all_totals: bool = False) -> Table:
+    """
+    已格式化（全字符串列）的 DataFrame → 带样式的 ReportLab Table
+
+    Args:
+        body: _format_cells 的输出
+        font_name: 字体名
+        col_widths: 固定列宽（分块表格各块对齐用），None 为自动
+        highlight_all_totals: 高亮所有合计行（默认只高亮最后一个）
+    """
+    headers = body.columns
+    # 合计行标记：首列一次性匹配（表头占第 0 行）
+    total_rows = [int(r) + 1 for r in body.get_column(headers[0]).str.contains(TOTAL_PATTERN).arg_true()]
+    if not highlight_all_totals:
+        total_rows = total_rows[-1:]
+
+    # 转换为列表 [header, row1, row2, ...]
+    data = [headers]
+    data.extend(body.rows())
+
+    # 创建 ReportLab 表格（跨页拆分时重复表头）
+    table = Table(data, colWidths=col_widths, hAlign='LEFT', repeatRows=1)
+
+    # 基础样式
+    table_style_list = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1A237E')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, -1), font_name),
+        ('FONTSIZE', (0, 0), (-1, 0), TABLE_HEADER_FONT_SIZE),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+        ('FONTSIZE', (0, 1), (-1, -1), TABLE_FONT_SIZE),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.lightgrey])
+    ]
+
+    # 如果有合计行，高亮显示
+    for total_row_index in total_rows:
+        table_style_list.append(('BACKGROUND', (0, total_row_index), (-1, total_row_index), colors.HexColor('#E8EAF6')))
+        table_style_list.append(('FONTNAME', (0, total_row_index), (-1, total_row_index), font_name))
+        table_style_list.append(('TEXTCOLOR', (0, total_row_index), (-1, total_row_index), colors.black))
+        table_style_list.append(('LINEABOVE', (0, total_row_index), (-1, total_row_index), 2, colors.HexColor('#1A237E')))
+
+    table.setStyle(TableStyle(table_style_list))
+    return table
+
+
+def _column_widths(df: pl.DataFrame, font_name: str, candidates: int = 20) -> list:
+    """
+    按整列测量列宽（与 Table 自动列宽相同：最宽单元格 + 左右内边距），供各分块共用
+
+    逐列格式化，只保留当前列的字符串；按字符数与字节数（中文字符 3 字节）各取最长的若干个再精确测量。
+    """
+    widths = []
+    for name in df.columns:
+        texts = _format_cells(df.select(name)).get_column(name)
+        longest = pl.concat([
+            texts.to_frame().top_k(candidates, by=pl.col(name).str.len_chars()),
+            texts.to_frame().top_k(candidates, by=pl.col(name).str.len_bytes()),
+        ]).get_column(name).to_list()
+        body = max((pdfmetrics.stringWidth(t, font_name, TABLE_FONT_SIZE) for t in longest), default=0)
+        header = pdfmetrics.stringWidth(name, font_name, TABLE_HEADER_FONT_SIZE)
+        widths.append(max(body, header) + TABLE_CELL_PADDING)
+    return widths
+
+
+class _LazyTable(Flowable):
+    """
+    长表格的一个分块：排版时才格式化该块的行并构建 Table，绘制后立即释放
+
+    文档中同一时刻只有正在排版的分块持有单元格字符串，内存不随总行数增长。
+    各分块使用按整列测量的同一组列宽，保证上下对齐。
+    """
+
+    def __init__(self, chunk: pl.DataFrame, font_name: str, col_widths: list):
+        Flowable.__init__(self)
+        self.chunk = chunk
+        self.font_name = font_name
+        self.col_widths = col_widths
+        self.hAlign = 'LEFT'
+        self._table = None
+
+    def _get_table(self) -> Table:
+        if self._table is None:
+            self._table = _build_table(
+                _format_cells(self.chunk), self.font_name,
+                col_widths=self.col_widths, highlight_all_totals=True
+            )
+        return self._table
+
+    def wrap(self, availWidth, availHeight):
+        self.width, self.height = self._get_table().wrap(availWidth, availHeight)
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        # 分块在页尾放不下时交给 Table 拆分（拆出的部分重复表头）
+        parts = self._get_table().split(availWidth, availHeight)
+        if parts:
+            self._table = None
+        return parts
+
+    def draw(self):
+        self._get_table().drawOn(self.canv, 0, 0)
+        self._table = None
+
 
 class ReportExporter:
     """
@@ -40,45 +299,39 @@ class ReportExporter:
     def _extract_content(dashboard):
         """
         从仪表盘中提取图表和表格内容
+        优先复用仪表盘最近一次回调记录的产物；控件状态已变化时才重新执行分析逻辑
         返回: (figures_list, tables_data_list)
         """
         figures = []
         captured_tables = []
         
+        artifacts = recorded_artifacts(dashboard)
+        if artifacts is not None:
+            print(f"  ♻️ 复用最近一次回调的结果: {len(artifacts.figures)} 个图表, {len(artifacts.tables)} 个表格")
+            return list(artifacts.figures), list(artifacts.tables)
+        
         if not dashboard or not hasattr(dashboard, 'update_function') or not dashboard.update_function:
             return figures, captured_tables
-
-        # Mock 机制：深度物理拦截（拦截漏斗底端的 df_to_markdown）
-        import src.utils.polars_display as pd_util
-        
-        # 记录原始函数用于后续恢复
-        original_df_to_md = pd_util.df_to_markdown
-        
-        def mock_df_to_markdown(df, **kwargs):
-            if df is not None:
-                # 抓取数据
-                captured_tables.append(df)
-                print(f"    ✨ 成功拦截底层表格数据: {df.height} 行")
-            # 调用原函数以生成输出对象（虽然在 PDF 导出中我们不显式 display 它）
-            return original_df_to_md(df, **kwargs)
-        
-        # 物理替换模块底层的函数入口
-        pd_util.df_to_markdown = mock_df_to_markdown
         
+        state = dashboard.widget_state() if hasattr(dashboard, 'widget_state') else None
+
         try:
             print("  🔄 正在执行分析逻辑并捕获多维内容...")
-            # 当此函数执行时，其内部调用的 print_markdown_table 
-            # 将会由于 Python 的 Module Globals 查找机制寻找到我们 mock 的 df_to_markdown
-            fig = dashboard.update_function()
+            # print_markdown_table 输出的表格记入当前线程的捕获列表（不修改任何模块全局）
+            with capture() as captured_tables:
+                fig = dashboard.update_function()
+            if getattr(dashboard, 'base_figure', None) is not None:
+                # patch 模式：更新函数返回的是增量数据，需先应用到基础图表
+                fig = dashboard.apply_patch(fig)
             if fig:
                 figures = fig if isinstance(fig, list) else [fig]
+            if state is not None:
+                # 记录本次结果，同一状态下的后续导出不再重复计算
+                dashboard.artifacts = ReportArtifacts(state, as_figures(fig), captured_tables)
         except Exception as e:
             print(f"  ⚠️ 内容提取失败: {e}")
             import traceback
             traceback.print_exc()
-        finally:
-            # 恢复现场
-            pd_util.df_to_markdown = original_df_to_md
             
         print(f"  ✅ 提取结果: {len(figures)} 个图表, {len(captured_tables)} 个表格")
         return figures, captured_tables
@@ -89,75 +342,52 @@ class ReportExporter:
         if df is None or df.is_empty():
             return None
             
-        # 转换为列表 [header, row1, row2, ...]
         headers = df.columns
-        data = [headers]
         
-        # 智能截取逻辑：默认显示前 100 行
+        # 智能截取逻辑：默认显示前 100 行（只格式化要显示的行）
         MAX_SHOW = 100
         if df.height > MAX_SHOW:
-            rows = df.head(MAX_SHOW-1).to_numpy().tolist()
+            body = _format_cells(pl.concat([df.head(MAX_SHOW-1), df.tail(1)]))
             # 探测最后一行是否是合计行
-            last_row = df.tail(1)
-            first_val = str(last_row[0, 0]) if last_row.width > 0 else ""
-            if "合计" in first_val or "Total" in first_val or "SUM" in first_val.upper():
-                rows.append(last_row.to_numpy().tolist()[0])
-            else:
-                rows.append(["..." for _ in headers])
+            first_val = body[-1, 0]
+            if not ("合计" in first_val or "Total" in first_val or "SUM" in first_val.upper()):
+                body = pl.concat([body.head(MAX_SHOW-1), pl.DataFrame({col: ["..."] for col in headers})])
         else:
-            rows = df.to_numpy().tolist()
-            
-        data.extend(rows)
+            body = _format_cells(df)
         
-        # 处理数值格式与合计行标记
-        total_row_index = -1
-        for r in range(1, len(data)):
-            # 探测这一行是不是合计行
-            first_cell = str(data[r][0])
-            if "合计" in first_cell or "Total" in first_cell:
-                total_row_index = r
-                
-            for c in range(len(data[r])):
-                val = data[r][c]
-                if isinstance(val, (float, int)) and not isinstance(val, bool):
-                    if isinstance(val, float): 
-                        data[r][c] = f"{val:,.2f}"
-                    else:
-                        data[r][c] = f"{val:,}"
-                elif val is None:
-                    data[r][c] = "-"
+        return _build_table(body, font_name)
 
-        # 创建 ReportLab 表格
-        table = Table(data, hAlign='LEFT')
-        
-        # 基础样式
-        table_style_list = [
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1A237E')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, -1), font_name),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.lightgrey])
-        ]
-        
-        # 如果有合计行，高亮显示
-        if total_row_index != -1:
-            table_style_list.append(('BACKGROUND', (0, total_row_index), (-1, total_row_index), colors.HexColor('#E8EAF6')))
-            table_style_list.append(('FONTNAME', (0, total_row_index), (-1, total_row_index), font_name))
-            table_style_list.append(('TEXTCOLOR', (0, total_row_index), (-1, total_row_index), colors.black))
-            table_style_list.append(('LINEABOVE', (0, total_row_index), (-1, total_row_index), 2, colors.HexColor('#1A237E')))
+    @staticmethod
+    def _create_pdf_table_chunks(df, font_name, chunk_rows=TABLE_CHUNK_ROWS):
+        """
+        完整输出长表格：按 chunk_rows 行切成固定大小的分块，每块带表头，排版时才构建
+
+        Args:
+            df: Polars DataFrame（切片为零拷贝视图）
+            font_name: 字体名
+            chunk_rows: 每块行数（约一页）
+
+        Returns:
+            Flowable 列表（直接加入 elements）
+        """
+        if df is None or df.is_empty():
+            return []
+        col_widths = _column_widths(df, font_name)
+        return [_LazyTable(chunk, font_name, col_widths) for chunk in df.iter_slices(n_rows=chunk_rows)]
 
-        table.setStyle(TableStyle(table_style_list))
-        return table
 
     @staticmethod
-    def export_to_pdf(dashboard=None, filename=None, title="数据分析报告", author="AI Data Analyst"):
+    def export_to_pdf(dashboard=None, filename=None, title="数据分析报告", author="AI Data Analyst", render_workers=None, section_workers=None,
+                      full_tables=False, table_chunk_rows=TABLE_CHUNK_ROWS):
         """
         将 dashboard (单个或列表) 导出为 PDF 报告
+        
+        Args:
+            render_workers: 图表并行渲染数（默认 min(4, CPU 核数, 图表数)）
+            section_workers: 多仪表盘时并行生成各部分的线程数（默认 min(4, CPU 核数, 仪表盘数)）
+            full_tables: 完整输出表格（按 table_chunk_rows 行分块、重复表头，适合数万行的附录表）；
+                默认只显示前 100 行
+            table_chunk_rows: 完整表格模式下每个分块的行数
         """
         try:
             import kaleido  # 必须安装: pip install kaleido
@@ -186,38 +416,8 @@ class ReportExporter:
 
         print(f"🚀 开始生成 PDF 报告: {filename}...")
 
-        # 尝试加载中文字体
-        font_name = 'Helvetica'  # 默认降级
-        
-        try:
-            # 使用系统中实际存在的中文字体
-            fonts_to_try = [
-                ("/System/Library/Fonts/Hiragino Sans GB.ttc", 0),  # Mac - 东青黑体
-                ("/System/Library/Fonts/STHeiti Medium.ttc", 0),    # Mac - 华文黑体
-                ("C:\\Windows\\Fonts\\msyh.ttc", 0),                # Windows - 微软雅黑
-                ("C:\\Windows\\Fonts\\simhei.ttf", None),           # Windows - 黑体
-            ]
-            
-            for font_path, subfont_index in fonts_to_try:
-                if os.path.exists(font_path):
-                    try:
-                        if subfont_index is not None:
-                            pdfmetrics.registerFont(TTFont('ChineseFont', font_path, subfontIndex=subfont_index))
-                        else:
-                            pdfmetrics.registerFont(TTFont('ChineseFont', font_path))
-                        
-                        font_name = 'ChineseFont'
-                        print(f"✅ 成功加载中文字体: {font_path}")
-                        break
-                    except Exception as e:
-                        print(f"⚠️ 尝试加载 {font_path} 失败: {e}")
-                        continue
-            
-            if font_name == 'Helvetica':
-                print("⚠️ 警告: 未找到支持的中文字体")
-                
-        except Exception as e:
-            print(f"❌ 字体加载过程出错: {e}")
+        # 加载中文字体（每个进程只注册一次）
+        font_name = _register_chinese_font()
 
         doc = SimpleDocTemplate(str(output_path), pagesize=A4)
         styles = getSampleStyleSheet()
@@ -280,20 +480,22 @@ class ReportExporter:
         elements.append(PageBreak())
 
         # -- 各仪表盘详情页面 --
-        temp_images = []
-        for db_idx, db in enumerate(dashboards):
+        # 每个仪表盘独立生成一个部分（提取内容、转换表格）；图表先占位：(部分内的位置, 图表)
+        def build_section(db_idx, db):
+            section = []
+            charts = []
             print(f"\n📑 处理仪表盘 {db_idx+1} ({db.title if hasattr(db, 'title') else '未命名'}):")
             
             # 1. 提取元数据
             notes = ReportExporter._extract_metadata(db.update_function) if hasattr(db, 'update_function') else None
             
             # 2. 详情页页眉
-            elements.append(Paragraph(f"第 {db_idx+1} 部分: {db.title if hasattr(db, 'title') else '数据分析'}", heading2_style))
-            elements.append(Spacer(1, 10))
+            section.append(Paragraph(f"第 {db_idx+1} 部分: {db.title if hasattr(db, 'title') else '数据分析'}", heading2_style))
+            section.append(Spacer(1, 10))
 
             # 3. 业务逻辑说明 (解析极简 Markdown)
             if notes:
-                elements.append(Paragraph("📖 业务逻辑说明", heading3_style))
+                section.append(Paragraph("📖 业务逻辑说明", heading3_style))
                 for line in notes.split('\n'):
                     line = line.strip()
                     if not line: continue
@@ -303,48 +505,54 @@ class ReportExporter:
                     
                     # B. 匹配标题 ###
                     if line.startswith('###'):
-                        elements.append(Paragraph(line.replace('###', '').strip(), heading3_style))
+                        section.append(Paragraph(line.replace('###', '').strip(), heading3_style))
                     # C. 匹配标题 ##
                     elif line.startswith('##'):
-                        elements.append(Paragraph(line.replace('##', '').strip(), heading2_style))
+                        section.append(Paragraph(line.replace('##', '').strip(), heading2_style))
                     # D. 匹配列表 - 或 *
                     elif line.startswith('- ') or line.startswith('* '):
                         clean_text = line[2:].strip()
-                        elements.append(Paragraph(f"• {clean_text}", list_item_style))
+                        section.append(Paragraph(f"• {clean_text}", list_item_style))
                     # E. 普通文本
                     else:
-                        elements.append(Paragraph(line, body_style))
+                        section.append(Paragraph(line, body_style))
                         
-                elements.append(Spacer(1, 15))
+                section.append(Spacer(1, 15))
 
-            # 4. 提取内容 (图表 + 表格)
+            # 4. 提取内容 (图表 + 表格)，各部分在不同线程中执行
             db_figures, db_tables = ReportExporter._extract_content(db)
             
             if not db_figures and not db_tables:
                 print(f"  ⚠️ 警告: 仪表盘 {db_idx+1} 未能提取到任何内容")
-                continue
+                return section, charts
 
             # 5. 分析配置
             if hasattr(db, 'widgets'):
-                elements.append(Paragraph("📋 分析配置 (Filters & Aggregation)", heading3_style))
+                section.append(Paragraph("📋 分析配置 (Filters & Aggregation)", heading3_style))
                 for name, widget in db.widgets.items():
                     if name.startswith('_') and name != '_aggregation_dimension':
                         continue
                     val = widget.value
                     label = "当前聚合维度" if name == '_aggregation_dimension' else name
                     val_str = ", ".join([str(v) for v in val]) if isinstance(val, list) else str(val)
-                    elements.append(Paragraph(f"• <b>{label}:</b> {val_str}", body_style))
-                elements.append(Spacer(1, 15))
+                    section.append(Paragraph(f"• <b>{label}:</b> {val_str}", body_style))
+                section.append(Spacer(1, 15))
 
             # 6. 汇总数据表
             if db_tables:
-                elements.append(Paragraph("📊 汇总数据表", heading3_style))
-                elements.append(Spacer(1, 10))
+                section.append(Paragraph("📊 汇总数据表", heading3_style))
+                section.append(Spacer(1, 10))
                 for df in db_tables:
+                    if full_tables:
+                        chunks = ReportExporter._create_pdf_table_chunks(df, font_name, table_chunk_rows)
+                        if chunks:
+                            section.extend(chunks)
+                            section.append(Spacer(1, 20))
+                        continue
                     pdf_table = ReportExporter._create_pdf_table(df, font_name, body_style)
                     if pdf_table:
-                        elements.append(pdf_table)
-                        elements.append(Spacer(1, 20))
+                        section.append(pdf_table)
+                        section.append(Spacer(1, 20))
 
             # 7. 渲染图表
             for fig_idx, fig in enumerate(db_figures):
@@ -352,32 +560,43 @@ class ReportExporter:
                 if hasattr(fig, 'layout') and hasattr(fig.layout, 'title') and fig.layout.title:
                     chart_title = fig.layout.title.text or chart_title
 
-                elements.append(Paragraph(f"📊 {chart_title}", heading3_style))
-                elements.append(Spacer(1, 5))
-
-                img_path = f"temp_db{db_idx}_fig{fig_idx}.png"
-                try:
-                    fig.write_image(img_path, format="png", width=1200, height=800, scale=2)
-                    temp_images.append(img_path)
-                    img = Image(img_path, width=6.5*inch, height=4*inch)
-                    elements.append(img)
-                    elements.append(Spacer(1, 20))
-                except Exception as e:
-                    print(f"  ❌ 图表导出失败: {e}")
+                section.append(Paragraph(f"📊 {chart_title}", heading3_style))
+                section.append(Spacer(1, 5))
+
+                charts.append((len(section), fig))
+                section.append(None)
+                section.append(Spacer(1, 20))
                 
                 if (fig_idx + 1) % 2 == 0:
-                    elements.append(PageBreak())
+                    section.append(PageBreak())
 
             if db_idx < len(dashboards) - 1:
-                elements.append(PageBreak())
+                section.append(PageBreak())
+            return section, charts
+
+        workers = section_workers or max(1, min(4, os.cpu_count() or 1, len(dashboards)))
+        if workers > 1 and len(dashboards) > 1:
+            print(f"⚙️ 并行生成 {len(dashboards)} 个部分（线程 {workers}）")
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                sections = list(pool.map(build_section, range(len(dashboards)), dashboards))
+        else:
+            sections = [build_section(db_idx, db) for db_idx, db in enumerate(dashboards)]
+
+        # 按原顺序拼接各部分，并换算图表占位在 elements 中的位置
+        pending_charts = []
+        for section, charts in sections:
+            pending_charts.extend((len(elements) + position, fig) for position, fig in charts)
+            elements.extend(section)
+
+        # 并行渲染所有图表（单个渲染器处理全部部分的图表），图片字节直接交给 ReportLab（不落盘）
+        images = render_figures([fig for _, fig in pending_charts], workers=render_workers)
+        for (position, _), data in zip(pending_charts, images):
+            if data is not None:
+                elements[position] = Image(io.BytesIO(data), width=6.5*inch, height=4*inch)
+        elements = [element for element in elements if element is not None]
 
         # 生成 PDF
         doc.build(elements)
 
-        # 清理临时文件
-        for img in temp_images:
-            if os.path.exists(img):
-                os.remove(img)
-
         print(f"✅ 报告已成功导出至: {output_path}")
         return str(output_path)
@@ -3,6 +3,8 @@ from datetime import datetime
 import plotly.io as pio
 from pathlib import Path
 
+from src.utils.artifacts import recorded_artifacts
+
 class SimpleHTMLExporter:
     """
     简化版导出器：导出为 HTML 格式（可以用浏览器打印为 PDF）
@@ -51,8 +53,14 @@ class SimpleHTMLExporter:
         print("🔍 正在提取图表...")
         
         if dashboard:
+            # 方法 0: 复用最近一次回调记录的产物（控件状态未变时）
+            artifacts = recorded_artifacts(dashboard)
+            if artifacts is not None and artifacts.figures:
+                figures = list(artifacts.figures)
+                print(f"  ♻️ 复用最近一次回调的 {len(figures)} 个图表")
+
             # 方法 1: 直接从 current_figure 属性获取
-            if hasattr(dashboard, 'current_figure') and dashboard.current_figure:
+            if not figures and hasattr(dashboard, 'current_figure') and dashboard.current_figure:
                 if isinstance(dashboard.current_figure, list):
                     figures = dashboard.current_figure
                     print(f"  ✅ 从 current_figure 列表获取到 {len(figures)} 个图表")
@@ -72,6 +80,8 @@ class SimpleHTMLExporter:
                 try:
                     print("  🔄 尝试调用 update_function 生成图表...")
                     fig = dashboard.update_function()
+                    if getattr(dashboard, 'base_figure', None) is not None:
+                        fig = dashboard.apply_patch(fig)
                     if fig:
                         figures = [fig] if not isinstance(fig, list) else fig
                         print(f"  ✅ 通过调用 update_function 获取到 {len(figures)} 个图表")
@@ -82,8 +92,8 @@ class SimpleHTMLExporter:
             print("  ❌ 警告: 未能提取到任何图表")
             print("  💡 提示: 请确保在运行导出前已经显示过仪表盘（执行过 dashboard.show()）")
 
-        # 3. 生成 HTML
-        html_content = f"""
+        # 3. 生成 HTML：各部分生成后直接写入文件，不在内存中拼接整个文档
+        header = f"""
 <!DOCTYPE html>
 <html>
 <head>
@@ -153,45 +163,46 @@ class SimpleHTMLExporter:
     </div>
 """
 
-        # 添加图表
-        print(f"\n📊 开始处理 {len(figures)} 个图表...")
-        
-        for i, fig in enumerate(figures):
-            try:
-                # 获取图表标题
-                chart_title = f"图表 {i+1}"
-                if hasattr(fig, 'layout') and hasattr(fig.layout, 'title') and fig.layout.title:
-                    chart_title = fig.layout.title.text or chart_title
-                
-                chart_div = f"chart_{i}"
-                chart_json = fig.to_json()
-                
-                print(f"  ✅ 处理图表 {i+1}/{len(figures)}: {chart_title}")
-                
-                html_content += f"""
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(header)
+            
+            # 添加图表
+            print(f"\n📊 开始处理 {len(figures)} 个图表...")
+            
+            for i, fig in enumerate(figures):
+                try:
+                    # 获取图表标题
+                    chart_title = f"图表 {i+1}"
+                    if hasattr(fig, 'layout') and hasattr(fig.layout, 'title') and fig.layout.title:
+                        chart_title = fig.layout.title.text or chart_title
+                    
+                    chart_div = f"chart_{i}"
+                    # 每个图表只序列化一次（安装了 orjson 时使用 orjson），"</" 转义防止提前结束 <script>
+                    chart_json = pio.to_json(fig, validate=False, engine="auto").replace("</", "<\\/")
+                    
+                    f.write(f"""
     <div class="content">
         <h2>📊 {chart_title}</h2>
         <div class="chart">
             <div id="{chart_div}"></div>
             <script>
-                var data = {chart_json};
+                var data = """)
+                    f.write(chart_json)
+                    f.write(f""";
                 Plotly.newPlot('{chart_div}', data.data, data.layout);
             </script>
         </div>
     </div>
-"""
-            except Exception as e:
-                print(f"  ❌ 处理图表 {i+1} 失败: {e}")
-                continue
+""")
+                    print(f"  ✅ 处理图表 {i+1}/{len(figures)}: {chart_title} ({len(chart_json) / 1024:,.0f} KB)")
+                except Exception as e:
+                    print(f"  ❌ 处理图表 {i+1} 失败: {e}")
+                    continue
 
-        html_content += """
+            f.write("""
 </body>
 </html>
-"""
-
-        # 4. 写入文件
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+""")
 
         print(f"✅ 报告已成功导出至: {output_path}")
         print(f"💡 提示: 打开 HTML 文件后，可以使用浏览器的 '打印' 功能保存为 PDF")
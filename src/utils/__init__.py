@@ -1,5 +1,6 @@
 """工具包"""
 
+from .artifacts import ReportArtifacts, capture, recorded_artifacts
 from .helpers import get_ai_context_path, load_ai_context
 from .polars_display import (
     df_to_markdown, 
@@ -8,6 +9,9 @@ from .polars_display import (
 )
 
 __all__ = [
+    "ReportArtifacts",
+    "capture",
+    "recorded_artifacts",
     "get_ai_context_path", 
     "load_ai_context",
     "df_to_markdown",
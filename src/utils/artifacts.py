@@ -0,0 +1,92 @@
+"""分析产物记录
+
+仪表盘每次回调产生的图表与表格作为结构化产物记录下来，导出报告时直接复用，
+无需再执行一遍更新函数；只有控件状态与记录时不同时，导出器才会重新计算。
+
+表格通过 capture() 收集：回调执行期间 print_markdown_table 输出的每个表格都会记入当前的捕获列表。
+捕获列表保存在 contextvars 中，每个线程 / 异步任务各自独立，多个仪表盘可在不同线程中同时导出。
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Hashable, List, Optional
+
+import plotly.graph_objects as go
+import polars as pl
+
+# 当前上下文生效的表格捕获列表（嵌套 capture() 时最内层生效）
+_current_tables: ContextVar[Optional[List[pl.DataFrame]]] = ContextVar('report_tables', default=None)
+
+
+class ReportArtifacts:
+    """
+    一次回调的产物：控件状态 + 图表 + 表格
+
+    Examples:
+        >>> artifacts = dashboard.artifacts
+        >>> artifacts.figures, artifacts.tables
+        ([Figure(...)], [shape: (12, 3) ...])
+    """
+
+    def __init__(self, state: Hashable, figures: List[Any], tables: List[pl.DataFrame]):
+        """
+        Args:
+            state: 产生这些产物时的控件状态键（见 src.dashboard.profiling.state_key）
+            figures: 图表列表
+            tables: 表格列表
+        """
+        self.state = state
+        self.figures = figures
+        self.tables = tables
+        self.created_at = time.time()
+
+    def __repr__(self) -> str:
+        return f"ReportArtifacts({len(self.figures)} 个图表, {len(self.tables)} 个表格)"
+
+
+@contextmanager
+def capture():
+    """
+    收集代码块中输出的表格（只收集当前线程 / 异步任务中的输出）
+
+    Examples:
+        >>> with capture() as tables:
+        ...     result = update(values)
+        >>> len(tables)
+        2
+    """
+    tables: List[pl.DataFrame] = []
+    token = _current_tables.set(tables)
+    try:
+        yield tables
+    finally:
+        _current_tables.reset(token)
+
+
+def record_table(df: Optional[pl.DataFrame]):
+    """向当前捕获列表记录一个表格（不在 capture() 中时不做任何事）"""
+    tables = _current_tables.get()
+    if df is not None and tables is not None:
+        tables.append(df)
+
+
+def as_figures(result: Any) -> List[Any]:
+    """更新函数的返回值 → 图表列表（只保留 Plotly 图表）"""
+    items = result if isinstance(result, list) else [result]
+    return [fig for fig in items if isinstance(fig, go.Figure)]
+
+
+def recorded_artifacts(dashboard: Any) -> Optional[ReportArtifacts]:
+    """
+    仪表盘最近一次回调的产物；控件状态已变化（或尚无记录）时返回 None
+
+    Args:
+        dashboard: 带有 artifacts 属性与 widget_state() 方法的仪表盘
+    """
+    artifacts = getattr(dashboard, 'artifacts', None)
+    if artifacts is None or not hasattr(dashboard, 'widget_state'):
+        return None
+    if artifacts.state != dashboard.widget_state():
+        return None
+    return artifacts
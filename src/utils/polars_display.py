@@ -7,6 +7,8 @@ import polars as pl
 from IPython.display import Markdown, display
 from typing import Optional
 
+from .artifacts import record_table
+
 
 def df_to_markdown(
     df: pl.DataFrame, 
@@ -91,4 +93,6 @@ def print_markdown_table(df: pl.DataFrame, max_rows: int = 100):
         >>> result = df.group_by('product').agg(pl.col('sales').sum())
         >>> print_markdown_table(result)
     """
+    # 在仪表盘回调中调用时，表格同时记为报告产物
+    record_table(df)
     display(df_to_markdown(df, max_rows=max_rows))
@@ -0,0 +1,16 @@
+"""可视化工具包"""
+
+from .charts import bar, column_array, line, trace_data
+from .downsample import downsample_figure, lttb
+from .render import FigureCache, render_figures
+
+__all__ = [
+    "FigureCache",
+    "bar",
+    "column_array",
+    "downsample_figure",
+    "line",
+    "lttb",
+    "render_figures",
+    "trace_data",
+]
@@ -0,0 +1,110 @@
+"""
+Polars → Plotly 直连绘图
+
+直接用 Polars 列的 NumPy 缓冲区构建 Plotly trace，不经过 `to_pandas()`：
+- 无空值的数值列为零拷贝视图，Plotly 序列化时以二进制 typed array 下发
+- 回调热路径中不再引入 pandas
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+import plotly.graph_objects as go
+import polars as pl
+
+
+def column_array(df: pl.DataFrame, column: str) -> np.ndarray:
+    """
+    取 DataFrame 的一列为 NumPy 数组（供 Plotly 使用）
+
+    - 数值列无空值时为零拷贝只读视图，有空值时转为 float 并以 NaN 表示
+    - Decimal 列转为 Float64
+    - 字符串 / 分类列为 object 数组
+    """
+    series = df.get_column(column)
+    if series.dtype == pl.Decimal:
+        series = series.cast(pl.Float64)
+    return series.to_numpy()
+
+
+def trace_data(df: pl.DataFrame, **columns: str) -> Dict[str, np.ndarray]:
+    """
+    构建 trace 数据字典，适用于 patch 模式的更新函数
+
+    Examples:
+        >>> trace_data(result, x=agg_axis, y='保费')
+        {'x': array([...]), 'y': array([...])}
+    """
+    return {key: column_array(df, col) for key, col in columns.items()}
+
+
+def _apply_layout(fig: go.Figure, title: Optional[str], height: Optional[int], x: str, y: str):
+    fig.update_layout(
+        title=title,
+        height=height,
+        autosize=True,
+        xaxis_title=x,
+        yaxis_title=y,
+    )
+
+
+def bar(
+    df: pl.DataFrame,
+    x: str,
+    y: str,
+    title: Optional[str] = None,
+    text: Optional[str] = None,
+    height: Optional[int] = None,
+    **trace_kwargs: Any
+) -> go.Figure:
+    """
+    柱状图（px.bar 的 Polars 直连版本）
+
+    Args:
+        df: Polars DataFrame
+        x: 分类轴字段
+        y: 数值字段
+        title: 图表标题
+        text: 柱上文字字段
+        height: 图表高度
+        **trace_kwargs: 传递给 go.Bar 的其他参数
+
+    Examples:
+        >>> fig = bar(result, x=agg_axis, y='保费', title='按险种统计')
+    """
+    data = trace_data(df, x=x, y=y)
+    if text is not None:
+        data['text'] = column_array(df, text)
+    trace_kwargs.setdefault('name', y)
+
+    fig = go.Figure(go.Bar(**data, **trace_kwargs))
+    _apply_layout(fig, title, height, x, y)
+    return fig
+
+
+def line(
+    df: pl.DataFrame,
+    x: str,
+    y: str,
+    title: Optional[str] = None,
+    mode: str = 'lines+markers',
+    height: Optional[int] = None,
+    **trace_kwargs: Any
+) -> go.Figure:
+    """
+    折线图（px.line 的 Polars 直连版本）
+
+    Args:
+        df: Polars DataFrame
+        x: 横轴字段
+        y: 数值字段
+        title: 图表标题
+        mode: Scatter 绘制模式
+        height: 图表高度
+        **trace_kwargs: 传递给 go.Scatter 的其他参数
+    """
+    trace_kwargs.setdefault('name', y)
+
+    fig = go.Figure(go.Scatter(**trace_data(df, x=x, y=y), mode=mode, **trace_kwargs))
+    _apply_layout(fig, title, height, x, y)
+    return fig
@@ -0,0 +1,250 @@
+"""
+大数据量图表降采样
+
+在图表下发到浏览器之前检测超大 trace：
+- 折线：LTTB（Largest-Triangle-Three-Buckets）降采样，保留视觉形状
+- 分类柱状图：保留 top-N 类别，其余合并为"其他"
+
+原始点数 / 合并项数会写入悬停提示（合并说明只出现在"其他"柱上），避免误读。
+提示用零宽字符标记，每次处理前先移除上一次的提示（patch 模式下同一图表会被反复处理）。
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import plotly.graph_objects as go
+
+OTHER_LABEL = '其他'
+
+# 悬停提示标记：NOTE_MARK 包裹追加的说明，GENERATED_MARK 标记由本模块生成的整个模板
+NOTE_MARK = '\u200b'
+GENERATED_MARK = '\u2060'
+_NOTE_PATTERN = re.compile(f'{NOTE_MARK}[^{NOTE_MARK}]*{NOTE_MARK}')
+# 逐点说明：模板中引用由本模块写入的 hovertext
+_POINT_NOTE = f'{NOTE_MARK}%{{hovertext}}{NOTE_MARK}'
+
+# 与 x/y 一一对应、需要同步截取的逐点属性
+_POINT_ATTRS = ('text', 'hovertext', 'customdata')
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    LTTB 降采样
+
+    Args:
+        x: 数值型横轴（已按升序排列）
+        y: 数值型纵轴
+        n_out: 目标点数（>= 3）
+
+    Returns:
+        被保留点的下标数组（升序，包含首尾点）
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # 中间的 n-2 个点均分到 n_out-2 个桶
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一个桶的平均点（最后一个桶用末点）
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = np.nanmean(y[next_start:next_end]) if next_end > next_start else y[-1]
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        area = np.abs(
+            (x[prev] - avg_x) * (bucket_y - y[prev])
+            - (x[prev] - bucket_x) * (avg_y - y[prev])
+        )
+        prev = start + int(np.nanargmax(area)) if np.isfinite(area).any() else start
+        selected[i + 1] = prev
+
+    return selected
+
+
+def _numeric_axis(values: np.ndarray) -> Optional[np.ndarray]:
+    """将横轴转为可计算面积的数值；非数值分类轴返回 None"""
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(float)
+    if np.issubdtype(values.dtype, np.number):
+        return values.astype(float)
+    return None
+
+
+def _take(trace, indices: np.ndarray):
+    """按下标同步截取 trace 的 x / y 及逐点属性"""
+    n = len(trace.y)
+    updates = {'x': np.asarray(trace.x)[indices], 'y': np.asarray(trace.y)[indices]}
+    for attr in _POINT_ATTRS:
+        value = getattr(trace, attr)
+        if isinstance(value, (list, tuple, np.ndarray)) and len(value) == n:
+            updates[attr] = np.asarray(value, dtype=object)[indices]
+    trace.update(updates)
+
+
+def _clear_notes(trace):
+    """移除上一次追加的悬停说明，恢复原始模板"""
+    template = trace.hovertemplate
+    if not template or NOTE_MARK not in template:
+        return
+    if _POINT_NOTE in template:
+        trace.hovertext = None
+    if template.startswith(GENERATED_MARK):
+        trace.hovertemplate = None
+    else:
+        trace.hovertemplate = _NOTE_PATTERN.sub('', template)
+
+
+def _annotate_hover(trace, note: str):
+    """在悬停提示中追加说明（所有点相同；原模板保留，如 px 生成的模板）"""
+    _insert_note(trace, f'{NOTE_MARK}<br>{note}{NOTE_MARK}')
+
+
+def _annotate_points(trace, notes: np.ndarray):
+    """
+    逐点悬停说明：写入 hovertext 并在模板中引用（空字符串的点不显示说明）
+
+    trace 已有逐点 hovertext 时不改动模板，只为说明非空的点填入 hovertext。
+    """
+    hovertext = trace.hovertext
+    if isinstance(hovertext, (list, tuple, np.ndarray)) and len(hovertext) == len(notes):
+        trace.hovertext = [note or text for note, text in zip(notes, hovertext)]
+        return
+    trace.hovertext = [f'<br>{note}' if note else '' for note in notes]
+    _insert_note(trace, _POINT_NOTE)
+
+
+def _insert_note(trace, marked: str):
+    template = trace.hovertemplate
+    if template:
+        if '<extra>' in template:
+            trace.hovertemplate = template.replace('<extra>', f'{marked}<extra>', 1)
+        else:
+            trace.hovertemplate = f'{template}{marked}'
+    else:
+        trace.hovertemplate = f'{GENERATED_MARK}%{{x}}<br>%{{y}}{marked}<extra>{trace.name or ""}</extra>'
+
+
+def downsample_line(trace, max_points: int) -> bool:
+    """对折线 trace 做 LTTB 降采样；返回是否发生降采样"""
+    if trace.y is None or len(trace.y) <= max_points:
+        return False
+
+    y = np.asarray(trace.y)
+    if not np.issubdtype(y.dtype, np.number):
+        return False
+
+    x_values = np.asarray(trace.x) if trace.x is not None else np.arange(len(y))
+    x = _numeric_axis(x_values)
+    if x is None:
+        x = np.arange(len(y), dtype=float)
+    elif len(x) > 1 and np.any(np.diff(x) < 0):
+        # LTTB 要求横轴有序
+        order = np.argsort(x, kind='stable')
+        _take(trace, order)
+        x = x[order]
+        y = np.asarray(trace.y)
+
+    n = len(y)
+    _take(trace, lttb(x, y, max_points))
+    _annotate_hover(trace, f'已降采样: {n:,} → {len(trace.y):,} 点')
+    return True
+
+
+def bucket_categories(traces: Sequence[Any], max_categories: int) -> bool:
+    """
+    对同一组分类柱状图做 top-N + "其他" 合并
+
+    多个 trace（分组/堆叠柱）按类别合计排序，使用同一组保留类别，保证对齐。
+    保留类别维持原顺序，"其他"追加在末尾。
+
+    Returns:
+        是否发生合并
+    """
+    def axes(trace):
+        return ('y', 'x') if trace.orientation == 'h' else ('x', 'y')
+
+    totals = {}
+    for trace in traces:
+        label_attr, value_attr = axes(trace)
+        labels, values = getattr(trace, label_attr), getattr(trace, value_attr)
+        if labels is None or values is None:
+            continue
+        for label, value in zip(labels, values):
+            if value is not None and not (isinstance(value, float) and np.isnan(value)):
+                totals[label] = totals.get(label, 0) + abs(value)
+
+    if len(totals) <= max_categories:
+        return False
+
+    ranked = sorted(totals, key=totals.get, reverse=True)
+    kept = set(ranked[:max_categories - 1])
+
+    for trace in traces:
+        label_attr, value_attr = axes(trace)
+        labels = np.asarray(getattr(trace, label_attr), dtype=object)
+        values = np.asarray(getattr(trace, value_attr), dtype=float)
+        mask = np.fromiter((label in kept for label in labels), dtype=bool, count=len(labels))
+        n_merged = int((~mask).sum())
+        other_value = float(np.nansum(values[~mask]))
+
+        updates = {
+            label_attr: np.append(labels[mask], OTHER_LABEL),
+            value_attr: np.append(values[mask], other_value),
+        }
+        for attr in _POINT_ATTRS:
+            value = getattr(trace, attr)
+            if isinstance(value, (list, tuple, np.ndarray)) and len(value) == len(labels):
+                extra = other_value if attr == 'text' else None
+                updates[attr] = np.append(np.asarray(value, dtype=object)[mask], extra)
+
+        trace.update(updates)
+        # 合并说明只挂在"其他"柱上（px 图表的模板不显示 hovertext，因此同时在模板中引用）
+        notes = np.full(int(mask.sum()) + 1, '', dtype=object)
+        notes[-1] = f'{OTHER_LABEL}: 合并 {n_merged:,} 项（原始共 {len(labels):,} 项）'
+        _annotate_points(trace, notes)
+    return True
+
+
+def downsample_figure(
+    fig: go.Figure,
+    max_points: Optional[int] = 5000,
+    max_categories: Optional[int] = 100
+) -> go.Figure:
+    """
+    原地降采样图表中超大的 trace
+
+    Args:
+        fig: Plotly 图表
+        max_points: 折线最大点数（None = 不处理）
+        max_categories: 柱状图最大类别数（含"其他"，None = 不处理）
+
+    Returns:
+        同一个 fig 对象
+    """
+    bar_groups: Dict[Tuple[str, str], List[Any]] = {}
+    for trace in fig.data:
+        _clear_notes(trace)
+        if trace.type in ('scatter', 'scattergl') and max_points:
+            if trace.mode is None or 'lines' in trace.mode:
+                downsample_line(trace, max_points)
+        elif trace.type == 'bar' and max_categories:
+            # 同一坐标轴（子图）上的柱子共用一组保留类别
+            bar_groups.setdefault((trace.xaxis, trace.yaxis), []).append(trace)
+
+    for (xaxis, yaxis), traces in bar_groups.items():
+        if bucket_categories(traces, max_categories):
+            # 数值 / 日期标签追加"其他"后，自动识别的线性或日期轴会丢掉这根柱子
+            axis = (yaxis or 'y') if traces[0].orientation == 'h' else (xaxis or 'x')
+            fig.layout[f'{axis[0]}axis{axis[1:]}'].type = 'category'
+    return fig
@@ -0,0 +1,206 @@
+"""
+静态图表并行渲染
+
+报告导出时一次性渲染所有图表，而不是逐个调用 `fig.write_image()`：
+- kaleido >= 1.0：同一个 Chrome 进程开 N 个标签页并行渲染，浏览器在整批图表间复用
+- kaleido 0.2.x：N 个工作进程，每个进程内的 kaleido 子进程在整批图表间复用
+
+每个图表的渲染耗时写入导出日志。
+
+渲染结果按内容寻址缓存在 Config.CACHE_PATH/figures：
+键为 图表 JSON + 渲染参数 + plotly/kaleido 版本 的 sha256，数据未变的图表直接复用上次的图片字节。
+"""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import diskcache
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from config import Config
+
+# (序号, 图片字节或 None, 耗时秒数, 错误)
+RenderResult = Tuple[int, Optional[bytes], float, Optional[Exception]]
+
+
+def _package_version(name: str) -> str:
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return "none"
+
+
+class FigureCache:
+    """
+    渲染图片的磁盘缓存（内容寻址）
+
+    Examples:
+        >>> cache = FigureCache()
+        >>> key = cache.key(pio.to_json(fig, validate=False), {'format': 'png', 'width': 1200})
+        >>> cache.get(key) or cache.set(key, png_bytes)
+    """
+
+    def __init__(self, directory=None, size_limit: int = 2 ** 30):
+        """
+        Args:
+            directory: 缓存目录（默认 Config.CACHE_PATH / "figures"）
+            size_limit: 缓存上限（字节），超出后按最近最少使用淘汰
+        """
+        self.directory = directory or Config.CACHE_PATH / "figures"
+        self._cache = diskcache.Cache(str(self.directory), size_limit=size_limit)
+        # 渲染器版本变化时输出可能不同，纳入缓存键
+        self._versions = f"plotly={_package_version('plotly')};kaleido={_package_version('kaleido')}"
+
+    def key(self, fig_json: str, opts: Dict[str, Any]) -> str:
+        digest = hashlib.sha256()
+        digest.update(fig_json.encode('utf-8'))
+        digest.update(json.dumps(opts, sort_keys=True).encode('utf-8'))
+        digest.update(self._versions.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    def set(self, key: str, data: bytes):
+        self._cache.set(key, data)
+
+    def close(self):
+        self._cache.close()
+
+
+def _default_workers(n_figures: int) -> int:
+    return max(1, min(4, os.cpu_count() or 1, n_figures))
+
+
+def _render_with_browser(figures: Sequence[go.Figure], opts: Dict[str, Any], workers: int) -> List[RenderResult]:
+    """kaleido >= 1.0：单个浏览器、workers 个标签页并行"""
+    import kaleido
+
+    async def render_one(renderer, index: int, fig: go.Figure) -> RenderResult:
+        start = time.perf_counter()
+        try:
+            data = await renderer.calc_fig(fig, opts=opts)
+            return index, data, time.perf_counter() - start, None
+        except Exception as e:
+            return index, None, time.perf_counter() - start, e
+
+    async def render_all() -> List[RenderResult]:
+        async with kaleido.Kaleido(n=workers) as renderer:
+            return await asyncio.gather(*(render_one(renderer, i, fig) for i, fig in enumerate(figures)))
+
+    # Jupyter 中已有运行中的事件循环，在独立线程里运行
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, render_all()).result()
+
+
+def _render_json(index: int, fig_json: str, opts: Dict[str, Any]) -> RenderResult:
+    """工作进程入口（kaleido 0.2.x）"""
+    start = time.perf_counter()
+    try:
+        data = pio.to_image(pio.from_json(fig_json, skip_invalid=True), **opts)
+        return index, data, time.perf_counter() - start, None
+    except Exception as e:
+        return index, None, time.perf_counter() - start, e
+
+
+def _render_with_processes(figures: Sequence[go.Figure], opts: Dict[str, Any], workers: int) -> List[RenderResult]:
+    """kaleido 0.2.x：进程池并行，每个进程复用自己的 kaleido 子进程"""
+    payloads = [pio.to_json(fig, validate=False) for fig in figures]
+    if workers == 1:
+        return [_render_json(i, payload, opts) for i, payload in enumerate(payloads)]
+
+    # spawn 启动：调用方已运行过 Polars，fork 出的子进程可能死锁
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(_render_json, i, payload, opts) for i, payload in enumerate(payloads)]
+        return [future.result() for future in futures]
+
+
+def render_figures(
+    figures: Sequence[go.Figure],
+    workers: Optional[int] = None,
+    format: str = "png",
+    width: int = 1200,
+    height: int = 800,
+    scale: float = 2,
+    cache: Optional[bool] = None
+) -> List[Optional[bytes]]:
+    """
+    并行渲染一批图表为图片字节
+
+    Args:
+        figures: Plotly 图表列表
+        workers: 并行数（默认 min(4, CPU 核数, 图表数)）
+        format: 图片格式
+        width / height / scale: 渲染尺寸
+        cache: 是否使用渲染缓存（默认 Config.ENABLE_CACHE）
+
+    Returns:
+        与 figures 一一对应的图片字节；渲染失败的位置为 None
+
+    Examples:
+        >>> images = render_figures(figs, workers=4)
+        >>> Image(io.BytesIO(images[0]), width=6.5*inch, height=4*inch)
+    """
+    if not figures:
+        return []
+
+    opts = {'format': format, 'width': width, 'height': height, 'scale': scale}
+    images: List[Optional[bytes]] = [None] * len(figures)
+
+    figure_cache = FigureCache() if (Config.ENABLE_CACHE if cache is None else cache) else None
+    keys: List[Optional[str]] = [None] * len(figures)
+    if figure_cache is not None:
+        for i, fig in enumerate(figures):
+            keys[i] = figure_cache.key(pio.to_json(fig, validate=False), opts)
+            images[i] = figure_cache.get(keys[i])
+            if images[i] is not None:
+                print(f"    ♻️ 图表 {i + 1}: 缓存命中, {len(images[i]) / 1024:,.0f} KB")
+
+    missing = [i for i, data in enumerate(images) if data is None]
+    if not missing:
+        figure_cache.close()
+        return images
+
+    workers = workers or _default_workers(len(missing))
+    print(f"  🖼️ 渲染 {len(missing)} 个图表（并行 {workers}，缓存命中 {len(figures) - len(missing)}）...")
+
+    try:
+        import kaleido
+        use_browser = hasattr(kaleido, 'Kaleido')
+    except ImportError:
+        use_browser = False
+
+    start = time.perf_counter()
+    to_render = [figures[i] for i in missing]
+    try:
+        if use_browser:
+            results = _render_with_browser(to_render, opts, workers)
+        else:
+            results = _render_with_processes(to_render, opts, workers)
+    except Exception as e:
+        print(f"  ❌ 图表渲染器启动失败: {e}")
+        results = []
+
+    for position, data, elapsed, error in results:
+        index = missing[position]
+        images[index] = data
+        if error is not None:
+            print(f"    ❌ 图表 {index + 1}: 渲染失败 ({elapsed:.2f}s): {error}")
+            continue
+        print(f"    ✅ 图表 {index + 1}: {elapsed:.2f}s, {len(data) / 1024:,.0f} KB")
+        if figure_cache is not None:
+            figure_cache.set(keys[index], data)
+
+    if figure_cache is not None:
+        figure_cache.close()
+    print(f"  ⏱️ 图表渲染总耗时 {time.perf_counter() - start:.2f}s")
+    return images
@@ -0,0 +1,60 @@
+# 大图降采样测试：LTTB 点数与首尾点、分类柱合并"其他"
+
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+from src.visualization.downsample import NOTE_MARK, OTHER_LABEL, downsample_figure, lttb
+
+
+@pytest.mark.parametrize('n, n_out', [(10, 3), (1000, 100), (10_001, 5000), (5000, 4999)])
+def test_lttb_keeps_ends_and_requested_count(n, n_out):
+    rng = np.random.default_rng(n)
+    x = np.sort(rng.uniform(0, 100, n))
+    y = rng.normal(size=n).cumsum()
+
+    kept = lttb(x, y, n_out)
+
+    assert len(kept) == n_out
+    assert kept[0] == 0 and kept[-1] == n - 1
+    assert np.all(np.diff(kept) > 0)
+
+
+@pytest.mark.parametrize('n_out', [50, 80, 2])
+def test_lttb_returns_all_points_when_nothing_to_drop(n_out):
+    x = np.arange(50, dtype=float)
+
+    assert lttb(x, np.sin(x), n_out).tolist() == list(range(50))
+
+
+def test_lttb_keeps_extreme_spike():
+    x = np.arange(10_000, dtype=float)
+    y = np.zeros(10_000)
+    y[4321] = 100.0
+
+    assert 4321 in lttb(x, y, 200)
+
+
+def test_downsample_line_figure_keeps_ends():
+    x = np.arange(20_000)
+    fig = go.Figure(go.Scatter(x=x, y=np.sin(x / 100), mode='lines'))
+
+    downsample_figure(fig, max_points=1000)
+
+    trace = fig.data[0]
+    assert len(trace.x) == 1000
+    assert trace.x[0] == 0 and trace.x[-1] == 19_999
+
+
+def test_bucket_numeric_labels_keeps_other_bar_and_notes_only_it():
+    labels = list(range(2000, 2030))
+    fig = go.Figure(go.Bar(x=labels, y=list(range(1, 31))))
+
+    downsample_figure(fig, max_categories=10)
+
+    trace = fig.data[0]
+    assert len(trace.x) == 10 and trace.x[-1] == OTHER_LABEL
+    assert fig.layout.xaxis.type == 'category'
+    notes = list(trace.hovertext)
+    assert all(note == '' for note in notes[:-1]) and notes[-1]
+    assert NOTE_MARK in trace.hovertemplate
@@ -0,0 +1,52 @@
+# PDF 表格单元格向量化格式化与逐值 f-string 格式化的一致性测试
+
+import numpy as np
+import polars as pl
+import pytest
+
+from src.exporter import EXACT_FLOAT_LIMIT, _format_cells
+
+
+def _expected_float(v):
+    return '-' if v is None else f"{v:,.2f}"
+
+
+FLOATS = [
+    0.0, -0.0, 0.005, -0.005, 2.675, 1.005, 0.125, -1234567.891, 99999999999.995,
+    EXACT_FLOAT_LIMIT * 0.999, EXACT_FLOAT_LIMIT, -EXACT_FLOAT_LIMIT * 1.001,
+    1e20, 1e23, 9.99e35, 1e36, -3e40, 1.7e308,
+    float('nan'), float('inf'), float('-inf'), None,
+]
+
+
+@pytest.mark.parametrize('dtype', [pl.Float64, pl.Float32])
+def test_float_cells_match_fstring(dtype):
+    series = pl.Series('保费', FLOATS, dtype=dtype, strict=False)
+
+    result = _format_cells(series.to_frame()).get_column('保费').to_list()
+
+    assert result == [_expected_float(v) for v in series.to_list()]
+
+
+def test_random_float_cells_match_fstring():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([
+        rng.uniform(-1e6, 1e6, 5000).round(3),
+        rng.integers(-10**9, 10**9, 5000) / 1000 + 0.005,
+        rng.uniform(-1, 1, 5000) * 10.0 ** rng.integers(-5, 40, 5000),
+    ])
+    df = pl.DataFrame({'x': values})
+
+    result = _format_cells(df).get_column('x').to_list()
+
+    assert result == [_expected_float(v) for v in values.tolist()]
+
+
+@pytest.mark.parametrize('dtype, np_dtype', [(pl.Int64, np.int64), (pl.Int32, np.int32), (pl.UInt64, np.uint64)])
+def test_integer_cells_match_fstring(dtype, np_dtype):
+    info = np.iinfo(np_dtype)
+    values = [0, 7, 1000, 1234567, int(info.max), int(info.min), None]
+
+    result = _format_cells(pl.DataFrame({'n': values}, schema={'n': dtype})).get_column('n').to_list()
+
+    assert result == ['-' if v is None else f"{v:,}" for v in values]
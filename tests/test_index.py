@@ -0,0 +1,66 @@
+# 维度倒排索引 / 有序区间索引与谓词过滤的一致性测试
+
+from datetime import date, timedelta
+
+import numpy as np
+import polars as pl
+import pytest
+
+from src.dashboard.filters import apply_filter_expr, build_filter_expr
+from src.dashboard.index import DimensionIndex, SortedRangeIndex
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    n = 2000
+    regions = np.array(['北京', '上海', '广州', '深圳', None], dtype=object)
+    return pl.DataFrame({
+        '业务年度': rng.integers(2020, 2025, n),
+        '机构名称': regions[rng.integers(0, len(regions), n)],
+        '业务险种': rng.choice(['车险', '财产险', '意外险'], n),
+        '保险起期': [date(2024, 1, 1) + timedelta(days=int(d)) for d in rng.integers(0, 366, n)],
+    }).with_row_index('行号')
+
+
+@pytest.mark.parametrize('values', [
+    {'业务年度': 2023},
+    {'业务年度': [2021, 2024], '机构名称': ['北京', '深圳']},
+    {'业务年度': '全选', '机构名称': '上海'},
+    {'业务年度': 2022, '业务险种': '车险'},  # 业务险种未建索引 → residual
+    {'机构名称': ['不存在']},
+    {'业务年度': '全选', '机构名称': '全选'},
+])
+def test_dimension_index_matches_predicate(df, values):
+    index = DimensionIndex(df, ['业务年度', '机构名称'])
+
+    expected = apply_filter_expr(df, build_filter_expr(values))
+    result = index.filter(df, values)
+
+    assert result.get_column('行号').to_list() == expected.get_column('行号').to_list()
+
+
+def test_dimension_index_returns_residual(df):
+    index = DimensionIndex(df, ['业务年度'])
+
+    rows, residual = index.lookup({'业务年度': 2023, '业务险种': '车险'})
+
+    assert residual == {'业务险种': '车险'}
+    assert rows.tolist() == df.filter(pl.col('业务年度') == 2023).get_column('行号').to_list()
+
+
+@pytest.mark.parametrize('start, end', [
+    (date(2024, 3, 1), date(2024, 3, 31)),
+    (date(2023, 1, 1), date(2024, 1, 1)),
+    (date(2024, 12, 31), date(2025, 6, 1)),
+    (date(2024, 6, 1), date(2024, 5, 1)),
+])
+def test_sorted_range_index_matches_is_between(df, start, end):
+    column = df.get_column('保险起期')
+    df = df.with_columns(column.scatter([0, 5, 9], None))  # 空值不参与区间匹配
+    index = SortedRangeIndex(df.get_column('保险起期'))
+
+    expected = df.filter(pl.col('保险起期').is_between(start, end)).get_column('行号').to_list()
+
+    assert index.rows(start, end).tolist() == expected
+    assert index.count(start, end) == len(expected)
@@ -0,0 +1,41 @@
+# 回调耗时分析器的序列化测试（多进程导出会 pickle 整个仪表盘）
+
+import contextlib
+import io
+import pickle
+
+import polars as pl
+import pytest
+
+from src.dashboard import PanelDashboardBuilder
+from src.dashboard.profiling import CallbackProfiler
+
+
+def test_profiler_pickle_keeps_samples_and_recreates_locks():
+    profiler = CallbackProfiler(slow_ms=10_000)
+    profiler.on_record(lambda record: None)
+    with profiler.callback(('年', 2024)):
+        with profiler.phase('filter'):
+            pass
+
+    restored = pickle.loads(pickle.dumps(profiler))
+
+    assert [s['state'] for s in restored.state_stats()] == [('年', 2024)]
+    assert restored._listeners == []
+    with restored.callback(('年', 2023)):
+        pass
+    assert len(restored.state_stats()) == 2
+
+
+def test_dashboard_with_profiling_is_picklable():
+    # joblib (loky) 用 cloudpickle 把任务连同仪表盘发送给工作进程
+    cloudpickle = pytest.importorskip('cloudpickle')
+    df = pl.DataFrame({'年': [2022, 2023, 2024] * 5, 'v': [1.0] * 15})
+    with contextlib.redirect_stdout(io.StringIO()):
+        dashboard = PanelDashboardBuilder.from_data(df, ['年'])
+    dashboard.enable_profiling()
+
+    restored = cloudpickle.loads(cloudpickle.dumps(dashboard))
+
+    assert isinstance(restored.profiler, CallbackProfiler)
+    assert restored.data.equals(df)
@@ -0,0 +1,16 @@
+# 多进程服务共享数据文件的清理测试
+
+import os
+
+from src.dashboard.serving import remove_stale_frames
+
+
+def test_remove_stale_frames_keeps_files_of_live_processes(tmp_path):
+    live = tmp_path / f"serving_{os.getpid()}_abc.arrow"
+    stale = tmp_path / "serving_999999999_abc.arrow"
+    other = tmp_path / "other.arrow"
+    for path in (live, stale, other):
+        path.write_bytes(b'')
+
+    assert remove_stale_frames(tmp_path) == 1
+    assert live.exists() and other.exists() and not stale.exists()
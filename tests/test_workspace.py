@@ -0,0 +1,23 @@
+# 多仪表盘工作区的序列化测试（成员仪表盘多进程导出时会连同工作区一起 pickle）
+
+import contextlib
+import io
+
+import polars as pl
+import pytest
+
+from src.dashboard import DashboardWorkspace
+
+
+def test_workspace_member_is_picklable():
+    cloudpickle = pytest.importorskip('cloudpickle')
+    df = pl.DataFrame({'年': [2022, 2023, 2024] * 5, 'v': [1.0] * 15})
+    with contextlib.redirect_stdout(io.StringIO()):
+        workspace = DashboardWorkspace(df, ['年'])
+        dashboard = workspace.add_dashboard("保费分析")
+    workspace.filtered()
+
+    restored = cloudpickle.loads(cloudpickle.dumps(dashboard))
+
+    assert restored.workspace._filtered is None
+    assert restored.workspace.filtered().height == df.height